@@ -1,220 +1,599 @@
 from structures import *
+from restarts import *
+from dimacs import parse_dimacs, clause_literals, open_cnf, iterate_archive
+from formula_cache import FormulaCache, content_key
+from preprocess import Preprocessor
+from drat import DRAT_TEXT, DRAT_BINARY, open_proof
+from checker import check_proof
+from evaluation import ClauseMatrix, clause_matrix
+from local_search import LocalSearch, PROBSAT, WALKSAT, LOCAL_SEARCH_ALGORITHMS
 import time
 import logging
+import io
 import os
-import errno
 
 logging.basicConfig(filename='debug.log', filemode='w', level=logging.DEBUG)
-COMMENT = 'c'
-INFO = 'p'
-
-OUTPUT_RESULTS_TO_FILE = True
-OUTPUT_DIRECTORY = "results\\"
-
-def parse_cnf(filename):
-    file = open(filename, 'r')
-    clauses = []
-    for line in file.readlines():
-        line = line.strip()
-        # Skip comments or info lines
-        if not line or COMMENT == line[0] or INFO == line[0]:
-            continue
-        # Ignore last value
-        literal_strings = line.split()[:-1]
-        if len(literal_strings) == 0:
-            continue
-        literals = tuple(map(Literal, literal_strings))
-        clauses.append(Clause(literals, 0))
 
+# Proof formats, besides DRAT_TEXT and DRAT_BINARY (see drat.py)
+RESOLUTION_PROOF = 'resolution' # The resolutions deriving the empty clause, see output_contradiction_proof
+
+# Answers
+SAT = 'SAT'
+UNSAT = 'UNSAT'
+UNKNOWN = 'UNKNOWN' # A limit was reached
+ERROR = 'ERROR'
+
+# Unit propagation modes
+WATCHED_LITERALS = 'watched'
+SCAN = 'scan' # Reference implementation that rescans every clause, used for differential testing
+BITSET = 'bitset' # Bitmasks over the literals and the clauses, for small formulas
+
+def make_propagator(propagation, num_variables):
+    """ Creates the unit propagation of a mode: WatchedLiterals, ClauseScan or BitsetPropagator """
+    if propagation == SCAN:
+        return ClauseScan(num_variables)
+    if propagation == BITSET:
+        return BitsetPropagator(num_variables)
+    return WatchedLiterals(num_variables)
+
+def parse_cnf(filename, stream=None, cache=None):
+    """ Parses a DIMACS file with the streaming parser in dimacs.py,
+    files ending with .gz, .bz2 or .xz are decompressed on the fly
+
+    :param stream: binary stream to parse instead of opening the file (e.g. a member of a tar archive)
+    :param cache: FormulaCache to load the parsed formula from (keyed by the content hash of the file), None to always parse
+    returns: (AssignmentList, list of Clauses)
+    """
+    if cache is not None:
+        _, literals, offsets = load_cnf(filename, stream, cache)
+    elif stream is None:
+        with open_cnf(filename) as file:
+            _, literals, offsets = parse_dimacs(file)
+    else:
+        _, literals, offsets = parse_dimacs(stream)
+    clauses = list(map(Clause, clause_literals(literals, offsets)))
     assignment_list = AssignmentList(clauses)
     return (assignment_list, clauses)
 
-def cdcl(assignment_list, clauses):
+def load_cnf(filename, stream, cache):
+    """ Loads the formula from the FormulaCache, parsing and storing it on a miss
+    returns: (num_variables, literals, offsets) as returned by parse_dimacs
+    """
+    if stream is None:
+        with open(filename, 'rb') as file:
+            data = file.read()
+        stream = open_cnf(io.BytesIO(data), filename)
+    else:
+        data = stream.read()
+        stream = io.BytesIO(data)
+    key = content_key(data)
+    formula = cache.get(key)
+    if formula is None:
+        formula = parse_dimacs(stream)
+        cache.put(key, *formula)
+    return formula
+
+def cdcl(assignment_list, clauses, propagation=WATCHED_LITERALS, clause_database=None, restart_policy=None,
+    limits=None, clause_exchange=None, prober=None, statistics=None):
     """ Conflict Driven Clause Learning Algorithm 
+    Variables are assigned on the trail of the AssignmentList, the clauses themselves are never copied.
+
+    :param propagation: WATCHED_LITERALS (default), SCAN for the reference implementation or BITSET
+    :param clause_database: ClauseDatabase that keeps the learnt clauses, a default one is used if None
+    :param restart_policy: restart policy from restarts.py, the solver never restarts if None
+    :param limits: SearchLimits on the number of conflicts and the time, no limits if None
+    :param clause_exchange: ClauseExchange (see clause_sharing.py) to export the short learnt clauses to and import the
+        clauses of the other workers from at every restart, None if clauses are not shared.
+        Imported clauses have no resolution steps, so it cannot be used when the clause_database records the proof.
+    :param prober: Prober (see probing.py) that probes the variables before the search, and between restarts if it
+        has a restart interval. None to never probe.
+    :param statistics: SearchStatistics the search counts its decisions, propagations, conflicts, ... in
     returns: (SAT/UNSAT boolean, AssignmentList, contradiction_clauses)
+        The result is None (unknown) if a limit was reached.
     """
-    contradiction_clauses = []
-
-    did_succeed, new_clauses, contradiction_clause = unit_propagation(assignment_list.decision_level, clauses)
-    if not did_succeed:
-        contradiction_clauses.append(contradiction_clause)
-        # logging.debug("did not succeed after first propagation")
-        return (False, assignment_list, contradiction_clauses)
-    
-    did_backtrack = False
-    while not assignment_list.all_values_assigned() or did_backtrack:
-        next_variable, value = assignment_list.assign_next(did_backtrack)
-
-        # Variable assignment to clauses
-        assigned_clauses = []
-        for clause in clauses:
-            if clause.evaluated_true:
-                assigned_clauses.append(clause)
-                continue
-            new_clause = clause.assign(next_variable, value, assignment_list.decision_level)
-            assigned_clauses.append(new_clause)
-        clauses = assigned_clauses
-
-        did_succeed, new_clauses, contradiction_clause = unit_propagation(assignment_list.decision_level, clauses)
-        if not did_succeed: # Conflict
-            contradiction_clauses.append(contradiction_clause)
-            learnt_clause, max_decision_level, max_variable = contradiction_clause.learn_new_clause(assignment_list)
-            # Check if we can backtrack to max_decision_level
-            backtrack_decision_level = assignment_list.get_backtrack_decision_level(max_decision_level)
-            logging.info("Contradiction clause: " + contradiction_clause.hidden_str() + ", with var: " + str(max_variable) \
-                + ", to dl: " + str(backtrack_decision_level))
-            if backtrack_decision_level == -1:
+    if clause_database is None:
+        clause_database = ClauseDatabase()
+    if restart_policy is None:
+        restart_policy = NoRestarts()
+    propagator = make_propagator(propagation, assignment_list.num_variables)
+
+    unit_clauses = []
+    for clause in clauses:
+        if clause.is_empty_clause():
+            return (False, assignment_list, [clause])
+        if clause.is_unit_clause():
+            unit_clauses.append(clause)
+        else:
+            propagator.watch(clause)
+
+    for unit_clause in unit_clauses:
+        literal = unit_clause.literals[0]
+        value = assignment_list.value_of(literal)
+        if value is None:
+            assignment_list.assign_literal(literal, unit_clause)
+        elif not value:
+            contradiction_clause, _ = analyze_conflict(assignment_list, unit_clause, clause_database)
+            return (False, assignment_list, [contradiction_clause])
+
+    if prober is not None:
+        contradiction_clause = prober.probe(assignment_list, propagator, clause_database)
+        if contradiction_clause is not None:
+            return (False, assignment_list, [contradiction_clause])
+
+    result, contradiction_clauses, _ = search(assignment_list, propagator, clause_database, restart_policy, limits,
+        clause_exchange, prober=prober, statistics=statistics)
+    return (result, assignment_list, contradiction_clauses)
+
+def search(assignment_list, propagator, clause_database, restart_policy, limits=None, clause_exchange=None,
+    assumptions=(), prober=None, statistics=None):
+    """ The CDCL search loop, from a state where every clause is watched by the propagator and every unit clause assigned
+    The assumptions are decided first, one per decision level, before any other decision (an assumption that is
+    already True gets an empty decision level). They are decided again after every backjump or restart below them.
+
+    :param assumptions: sequence of literals that must be True
+    :param prober: Prober (see probing.py) asked after every restart whether to probe the variables, None to never probe
+    :param statistics: SearchStatistics to count in, the counters are only kept for this call if None
+    returns: (SAT/UNSAT boolean, contradiction_clauses, failed_assumptions)
+        The result is None (unknown) if a limit was reached.
+        failed_assumptions is None unless the result is UNSAT because of the assumptions, it is then the subset of
+        the assumptions that cannot be True together (see analyze_final).
+    """
+    if statistics is None:
+        statistics = SearchStatistics()
+    timer = time.perf_counter
+    while True:
+        start = timer()
+        head = assignment_list.propagation_head
+        conflict_clause = propagator.propagate(assignment_list)
+        statistics.propagations += assignment_list.propagation_head - head
+        statistics.propagate_time += timer() - start
+        if conflict_clause is not None:
+            start = timer()
+            conflict_level = assignment_list.decision_level
+            learnt_clause, backtrack_decision_level = analyze_conflict(assignment_list, conflict_clause, clause_database)
+            statistics.analyze_time += timer() - start
+            if learnt_clause.is_empty_clause():
                 logging.debug("Unable to backtrack any further...")
-                return (False, assignment_list, contradiction_clauses)
-            
+                return (False, [learnt_clause], None)
+
             assignment_list.backtrack(backtrack_decision_level)
-            # Need to backtrack one step further for clauses (as it will be reassigned without incrementing decision level in the next iteration)
-            backtracked_clauses = list(map(lambda x: x.backtrack(backtrack_decision_level-1), clauses))
-            backtracked_clauses.append(learnt_clause)
             assignment_list.update_vsids_with(learnt_clause)
-            did_backtrack = True
-            clauses = backtracked_clauses
+            assignment_list.did_backtrack_divide_vsids()
+            clause_database.did_conflict()
+            if not learnt_clause.is_unit_clause():
+                clause_database.add_learnt(learnt_clause, assignment_list)
+                propagator.watch(learnt_clause)
+            else:
+                learnt_clause.lbd = 1
+            if clause_exchange is not None:
+                clause_exchange.export(learnt_clause)
+            restart_policy.did_conflict(learnt_clause.lbd)
+            statistics.did_learn(learnt_clause, conflict_level - backtrack_decision_level)
+            assignment_list.assign_literal(learnt_clause.literals[0], learnt_clause)
+            if clause_database.should_reduce():
+                propagator.remove(clause_database.reduce(assignment_list))
+            if limits is not None and limits.reached(clause_database.conflicts):
+                logging.debug("Search limit reached after " + str(clause_database.conflicts) + " conflicts")
+                return (None, [], None)
+        elif assignment_list.decision_level < len(assumptions):
+            assumption = assumptions[assignment_list.decision_level]
+            value = assignment_list.value_of(assumption)
+            if value is None:
+                assignment_list.decide(assumption)
+                statistics.decisions += 1
+            elif value:
+                assignment_list.new_decision_level()
+            else:
+                return (False, [], analyze_final(assignment_list, assumption))
+        elif assignment_list.all_values_assigned():
+            return (True, [], None)
+        elif restart_policy.should_restart():
+            logging.debug("Restarting after " + str(restart_policy.conflicts) + " conflicts")
+            assignment_list.restart()
+            restart_policy.did_restart()
+            statistics.restarts += 1
+            if clause_exchange is not None and not import_shared_clauses(assignment_list, propagator, clause_database,
+                clause_exchange):
+                return (False, [Clause([])], None)
+            if prober is not None and prober.did_restart():
+                contradiction_clause = prober.probe(assignment_list, propagator, clause_database)
+                if contradiction_clause is not None:
+                    return (False, [contradiction_clause], None)
         else:
-            # Unit propagation successful, replace old clauses with newly propagated clauses
-            did_backtrack = False
-            clauses = new_clauses
+            start = timer()
+            assignment_list.decide()
+            statistics.decisions += 1
+            statistics.decide_time += timer() - start
 
-    # Sanity check to make sure that clauses here are not contradictions
-    for clause in clauses:
-        if clause.is_empty_clause():
-            logging.debug("CONTRADICTION FOUND WHERE IT RETURNS BE SAT")
+def analyze_final(assignment_list, assumption):
+    """ Finds the assumptions that imply the negation of an assumption, by walking the implication graph back from it
+    Every decision on the trail is an assumption, since the assumptions are decided before any other decision.
 
-    return (True, assignment_list, [])
+    returns: list of the failed assumptions, starting with the given one
+    """
+    failed_assumptions = [assumption]
+    levels = assignment_list.levels
+    reasons = assignment_list.reasons
+    if levels[assumption >> 1] == 0:
+        return failed_assumptions
+    seen = {assumption >> 1}
+    for literal in reversed(assignment_list.trail[assignment_list.trail_limits[0]:]):
+        variable = literal >> 1
+        if variable not in seen:
+            continue
+        reason = reasons[variable]
+        if reason is None:
+            failed_assumptions.append(literal)
+        else:
+            seen.update(map(lambda x: x >> 1, filter(lambda x: levels[x >> 1] > 0, reason.literals)))
+    return failed_assumptions
 
+def add_clause_at_root(assignment_list, propagator, literals):
+    """ Adds a clause at the root level (with an empty trail above it)
+    Literals falsified at the root level are left out, a unit clause is assigned and a longer one is watched.
 
-def unit_propagation(decision_level, clauses):
-    """ Carries out unit propagation on the list of clauses
+    returns: the Clause that was added, None if it is satisfied at the root level,
+        False if every literal is falsified at the root level (the formula is UNSAT)
+    """
+    values = assignment_list.values
+    if any(map(lambda x: values[x] is True, literals)):
+        return None
+    unassigned = list(filter(lambda x: values[x] is None, dict.fromkeys(literals)))
+    if len(unassigned) == 0:
+        return False
+    clause = Clause(unassigned)
+    if len(unassigned) == 1:
+        assignment_list.assign_literal(unassigned[0], clause)
+    else:
+        propagator.watch(clause)
+    return clause
 
-    returns: If succeeeded, (True, new list of clauses, None)
-        If contradiction, (False, new list of clauses, clause that reached a contradiction)
+def import_shared_clauses(assignment_list, propagator, clause_database, clause_exchange):
+    """ Adds the clauses exported by the other workers, at the root level (after a restart)
+
+    returns: False if an imported clause is falsified at the root level (the formula is UNSAT), True otherwise
     """
-    # Check for any empty clauses first.
-    for clause in clauses:
-        if clause.is_empty_clause():
-            return (False, clauses, clause)
-
-    unpropagated_unit_clause = find_unpropagated_unit_clause(clauses)
-    while unpropagated_unit_clause is not None:
-        # Set flag to True (so that it will not be propagated again)
-        unpropagated_unit_clause.unit_clause_propagated = True
-
-        new_clauses = []
-        # Propagate with other clauses
-        for clause in clauses:
-            # Ignore self or clauses that are already true by variable assignment
-            if unpropagated_unit_clause is clause or clause.evaluated_true:
-                new_clauses.append(clause)
+    for literals, lbd in clause_exchange.import_clauses():
+        clause = add_clause_at_root(assignment_list, propagator, literals)
+        if clause is False:
+            return False
+        if clause is not None:
+            clause.learnt = True
+            if clause.is_unit_clause():
+                clause.lbd = 1
+            else:
+                clause_database.add_learnt(clause, assignment_list)
+                clause.lbd = min(lbd, len(clause.literals))
+    return True
+
+def analyze_conflict(assignment_list, conflict_clause, clause_database):
+    """ First-UIP conflict analysis over the implication graph
+    Resolves the conflict clause with the reasons of the literals assigned at the conflict level, in reverse trail
+    order, until a single literal of that level is left (the first unique implication point).
+    Literals assigned at the root level are always False, so they are left out of the learnt clause.
+    The learnt clauses taking part in the analysis have their activity bumped in the clause_database, and the learnt
+    clause is written to its proof.
+
+    returns: (learnt Clause, decision level to backjump to)
+        The learnt clause is empty when the conflict happens at the root level.
+        Its literals are ordered by decision level: the asserting literal first, followed by the literal
+        that decides the level to backjump to (the second highest decision level in the clause).
+    """
+    levels = assignment_list.levels
+    reasons = assignment_list.reasons
+    trail = assignment_list.trail
+    conflict_level = max(map(lambda x: levels[x >> 1], conflict_clause.literals), default=0)
+    if conflict_level == 0:
+        contradiction_clause = Clause([])
+        if clause_database.record_proof:
+            contradiction_clause.resolution_steps = [(conflict_clause, None)]
+            contradiction_clause.root_variables = list(map(lambda x: x >> 1, conflict_clause.literals))
+        if clause_database.proof is not None:
+            clause_database.proof.add([])
+        return (contradiction_clause, 0)
+
+    seen = set()
+    learnt_literals = [None]
+    root_variables = []
+    resolution_steps = [(conflict_clause, None)]
+    unresolved = 0 # Number of literals of the conflict level still to be resolved
+    clause = conflict_clause
+    index = len(trail) - 1
+    while True:
+        if clause.learnt:
+            clause_database.bump(clause)
+        for literal in clause.literals:
+            variable = literal >> 1
+            if variable in seen:
                 continue
+            seen.add(variable)
+            level = levels[variable]
+            if level == conflict_level:
+                unresolved += 1
+            elif level > 0:
+                learnt_literals.append(literal)
+            else:
+                root_variables.append(variable)
+        # Next literal of the conflict level on the trail that is part of the resolvent
+        while trail[index] >> 1 not in seen:
+            index -= 1
+        uip_literal = trail[index]
+        index -= 1
+        unresolved -= 1
+        if unresolved == 0:
+            break
+        clause = reasons[uip_literal >> 1]
+        resolution_steps.append((clause, uip_literal >> 1))
 
-            new_clause = clause.propagate_with(unpropagated_unit_clause, decision_level)
+    learnt_literals[0] = uip_literal ^ 1
+    learnt_clause = Clause(learnt_literals, conflict_level)
+    learnt_clause.learnt = True
+    if clause_database.record_proof:
+        learnt_clause.resolution_steps = resolution_steps
+        learnt_clause.root_variables = root_variables
+    if clause_database.proof is not None:
+        clause_database.proof.add(learnt_literals)
 
-            # Contradiction reached
-            if new_clause.is_empty_clause():
-                return (False, clauses, new_clause)
+    if len(learnt_literals) == 1:
+        return (learnt_clause, 0)
+    # Move the literal with the second highest decision level to position 1
+    second = max(range(1, len(learnt_literals)), key=lambda x: levels[learnt_literals[x] >> 1])
+    learnt_literals[1], learnt_literals[second] = learnt_literals[second], learnt_literals[1]
+    return (learnt_clause, levels[learnt_literals[1] >> 1])
 
-            new_clauses.append(new_clause)
+def run(filename, propagation=WATCHED_LITERALS, restarts=GLUCOSE, target_phase=False, stream=None, cache=None,
+    limits=None, portfolio=None, cube_and_conquer=None, share_clauses=False, preprocess=False,
+    probing=False, probe_interval=None, proof=None, proof_format=DRAT_TEXT, check_unsat=False, local_search=None,
+    hybrid_flips=None, statistics=None):
+    """ Solves a DIMACS file (plain or compressed with gzip, bzip2 or xz)
 
-        clauses = new_clauses
-        unpropagated_unit_clause = find_unpropagated_unit_clause(clauses)
+    :param propagation: unit propagation of the search, WATCHED_LITERALS, SCAN or BITSET (see make_propagator)
+    :param restarts: restart policy (NO_RESTARTS, LUBY, GEOMETRIC or GLUCOSE)
+    :param target_phase: whether decisions prefer the values of the longest trail over the saved phases
+    :param stream: binary stream to read the DIMACS from instead of the file, filename then only names the instance
+    :param cache: FormulaCache of parsed formulas, None to always parse the file
+    :param limits: SearchLimits of the search, the result is None if one is reached
+    :param portfolio: number of worker processes to race with different configurations (see portfolio.py),
+        the other parameters then only apply to the time limit. The configurations are logged.
+    :param share_clauses: whether the portfolio workers exchange their short learnt clauses (see clause_sharing.py),
+        the number of clauses every worker exported and imported is logged
+    :param cube_and_conquer: number of worker processes solving the cubes of the formula (see cube_and_conquer.py),
+        the other parameters then only apply to the time limit
+    :param preprocess: whether the formula is simplified first (see preprocess.py), the model is then reconstructed
+    :param probing: whether failed literals are probed before the search (see probing.py)
+    :param probe_interval: number of restarts between two probing rounds during the search, None to only probe before it
+    :param proof: file name the proof of an UNSAT answer is written to (or a writable binary stream for the DRAT
+        formats), None to write no proof
+    :param proof_format: DRAT_TEXT or DRAT_BINARY to stream the learnt and deleted clauses while solving (see drat.py),
+        the proof is then only complete for an UNSAT answer. RESOLUTION_PROOF to keep the resolution steps of every
+        derived clause in memory and write the resolutions deriving the empty clause after the search.
+    :param check_unsat: whether the DRAT proof of an UNSAT answer is checked against the clauses (see checker.py), the
+        result of the check is logged. The proof is kept in memory if no proof file name is given.
+    :param local_search: PROBSAT or WALKSAT to solve with stochastic local search (see local_search.py) instead of
+        cdcl(), which never answers UNSAT: the result is None once a limit is reached. The flip rate is logged.
+    :param hybrid_flips: with local_search, the number of flips after which the local search stops and cdcl() solves
+        the formula, starting from the best assignment found as saved phases
+    :param statistics: SearchStatistics filled by the search (see SearchStatistics.dump for its JSON), e.g. with a
+        progress_interval to log a progress line every N conflicts. A summary is logged in any case. Not used by the
+        portfolio and cube-and-conquer modes.
+    """
+    if portfolio:
+        return run_portfolio_mode(filename, portfolio, limits, share_clauses)
+    if cube_and_conquer:
+        return run_cube_and_conquer_mode(filename, cube_and_conquer, limits)
+    assignment_list, clauses = parse_cnf(filename, stream, cache)
+    solved = solve_formula(assignment_list, clauses, propagation, restarts, target_phase, limits, preprocess, probing,
+        probe_interval, proof, proof_format, check_unsat, local_search, hybrid_flips, statistics)
+    return solved.result, solved.variable_assignment, solved.assignment_list.branching_count, solved.time_elapsed
 
-    return (True, clauses, None)
+class SolvedFormula:
+    """ Outcome of solve_formula()
 
-def find_unpropagated_unit_clause(clauses):
-    """ Finds an unpropagated unit clause """
-    for clause in clauses:
-        if clause.is_unit_clause() and not clause.unit_clause_propagated:
-            return clause
-    return None
+    :attribute result: True if SAT, False if UNSAT, None if a limit was reached
+    :attribute variable_assignment: model of the original clauses if SAT (reconstructed after preprocessing), else None
+    :attribute verified: whether the model satisfies the original clauses, None if not SAT
+    :attribute assignment_list: AssignmentList of the search
+    :attribute clause_database: ClauseDatabase of the search
+    :attribute statistics: SearchStatistics of the search
+    :attribute searcher: LocalSearch, None without local search
+    :attribute prober: Prober, None without probing
+    :attribute checker: DratChecker of the proof of an UNSAT answer with check_unsat, None otherwise
+    :attribute check_time: seconds spent checking the proof
+    :attribute time_elapsed: seconds spent simplifying and solving, without the verification and the proof check
+    """
+
+    def __init__(self):
+        self.result = None
+        self.variable_assignment = None
+        self.verified = None
+        self.assignment_list = None
+        self.clause_database = None
+        self.statistics = None
+        self.searcher = None
+        self.prober = None
+        self.checker = None
+        self.check_time = 0
+        self.time_elapsed = 0
 
-def run(filename):
-    assignment_list, clauses = parse_cnf(filename)
+def solve_formula(assignment_list, clauses, propagation=WATCHED_LITERALS, restarts=GLUCOSE, target_phase=False,
+    limits=None, preprocess=False, probing=False, probe_interval=None, proof=None, proof_format=DRAT_TEXT,
+    check_unsat=False, local_search=None, hybrid_flips=None, statistics=None):
+    """ Solves parsed clauses: preprocessing, probing and local search as asked, the search, then the verification of
+    the model or the check of the proof. Shared by run() and the batch runner (test_folder.py).
+
+    :param assignment_list: AssignmentList of the clauses, as returned by parse_cnf
+    :param clauses: list of Clause, the original formula the model is verified and the proof checked against
+    The other parameters are the ones of run().
+    returns: SolvedFormula
+    """
+    solved = SolvedFormula()
     start = time.time()
-    result, assignment_list, contradiction_clauses = cdcl(assignment_list, clauses.copy())
-    
-    end = time.time()
-    time_elapsed = end - start
-    logging.info("Time Elapsed: " + str(time_elapsed))
-    variable_assignment = None
+    solver_clauses = clauses
+    preprocessor = None
+    if check_unsat and proof is None:
+        proof = io.BytesIO()
+        proof_format = DRAT_BINARY
+    record_proof = proof is not None and proof_format == RESOLUTION_PROOF
+    drat_writer = None
+    if proof is not None and not record_proof:
+        drat_writer = open_proof(proof, proof_format)
+    if preprocess:
+        preprocessor = Preprocessor(clauses, record_proof=record_proof, proof=drat_writer)
+        preprocessor.run()
+        logging.info("Preprocessing: " + preprocessor.summary())
+        solver_clauses = preprocessor.get_clauses()
+        assignment_list = AssignmentList(solver_clauses)
+    assignment_list.target_phase = target_phase
+    clause_database = ClauseDatabase(record_proof=record_proof, proof=drat_writer)
+    restart_policy = make_restart_policy(restarts)
+    if statistics is None:
+        statistics = SearchStatistics()
+    prober = None
+    if probing:
+        from probing import Prober # probing.py imports this module
+        prober = Prober(restart_interval=probe_interval)
+    searcher = None
+    if local_search is not None:
+        searcher = LocalSearch(solver_clauses, assignment_list.num_variables, local_search)
+    if preprocessor is not None and preprocessor.contradiction is not None:
+        result, contradiction_clauses = False, [preprocessor.contradiction]
+    elif searcher is not None and hybrid_flips is None:
+        result, contradiction_clauses = searcher.solve(limits=limits), []
+    else:
+        if searcher is not None:
+            searcher.solve(hybrid_flips, limits)
+            searcher.set_phases(assignment_list)
+        result, assignment_list, contradiction_clauses = cdcl(assignment_list, solver_clauses.copy(), propagation,
+            clause_database, restart_policy, limits, prober=prober, statistics=statistics)
+    logging.info("Statistics: " + statistics.summary())
+    if searcher is not None:
+        logging.info("Local search: " + searcher.summary())
+    if prober is not None:
+        logging.info("Probing: " + prober.summary())
+    if drat_writer is not None:
+        drat_writer.close()
+        logging.info("DRAT proof: " + str(drat_writer.lemma_count) + " lemmas, " + str(drat_writer.deletion_count)
+            + " deletions")
+
+    solved.time_elapsed = time.time() - start
+    logging.info("Time Elapsed: " + str(solved.time_elapsed))
+    solved.result = result
+    solved.assignment_list = assignment_list
+    solved.clause_database = clause_database
+    solved.statistics = statistics
+    solved.searcher = searcher
+    solved.prober = prober
     if result:
-        variable_assignment = assignment_list.get_variable_assignment()
-        verified_result = verify(variable_assignment, clauses)
-        if verified_result == result:
-            logging.info("Successfuly Verified to be: " + str(verified_result))
+        if searcher is not None and hybrid_flips is None:
+            variable_assignment = searcher.get_variable_assignment()
         else:
-            logging.info("ERROR Verified to be: " + str(verified_result) + " but result was: " + str(result))
-    else: # Contradiction
+            variable_assignment = assignment_list.get_variable_assignment()
+        if preprocessor is not None:
+            variable_assignment = preprocessor.reconstruct(variable_assignment)
+        solved.variable_assignment = variable_assignment
+        solved.verified = verify(variable_assignment, clauses)
+        if solved.verified == result:
+            logging.info("Successfuly Verified to be: " + str(solved.verified))
+        else:
+            logging.info("ERROR Verified to be: " + str(solved.verified) + " but result was: " + str(result))
+    elif result is not None and record_proof: # Contradiction
         all_proofs = []
         all_clauses_involved = []
         # Goes in order of created contradiction clauses
         for contradiction_clause in contradiction_clauses:
-            proofs, clauses_involved = contradiction_clause.generate_contradiction_proof()
+            proofs, clauses_involved = contradiction_clause.generate_contradiction_proof(assignment_list)
             all_proofs.extend(proofs)
             all_clauses_involved.extend(clauses_involved)
+        output_contradiction_proof(all_proofs, all_clauses_involved, proof)
+    if result is False and check_unsat:
+        check_start = time.time()
+        checker = check_proof(clauses, proof.getvalue() if isinstance(proof, io.BytesIO) else proof, proof_format)
+        solved.check_time = time.time() - check_start
+        solved.checker = checker
+        if checker.verified:
+            logging.info("Successfuly checked the proof: " + str(checker.checked_count) + " lemmas checked")
+        else:
+            logging.info("ERROR Proof rejected: " + checker.error)
+    return solved
+
+def run_portfolio_mode(filename, num_workers, limits, share_clauses):
+    """ run() with a portfolio of num_workers processes, returns the result of the winning worker """
+    from portfolio import run_portfolio # portfolio.py imports this module
+    start = time.time()
+    time_limit = None
+    if limits is not None and limits.deadline is not None:
+        time_limit = limits.deadline - start
+    winner, worker_results = run_portfolio(filename, num_workers, time_limit=time_limit, share_clauses=share_clauses)
+    time_elapsed = time.time() - start
+    if share_clauses:
+        for result in worker_results:
+            logging.info("Portfolio worker " + str(result['worker']) + " exported " + str(result.get('exported'))
+                + " and imported " + str(result.get('imported')) + " clauses")
+    if winner is None:
+        return None, None, 0, time_elapsed
+    logging.info("Portfolio winner: " + str(winner['configuration']))
+    return winner['status'] == SAT, winner['model'], winner['decisions'], time_elapsed
+
+def run_cube_and_conquer_mode(filename, num_workers, limits):
+    """ run() by cube-and-conquer on num_workers processes, the decisions are summed over the solved cubes """
+    from cube_and_conquer import run_cube_and_conquer # cube_and_conquer.py imports this module
+    start = time.time()
+    time_limit = None
+    if limits is not None and limits.deadline is not None:
+        time_limit = limits.deadline - start
+    status, model, statistics = run_cube_and_conquer(filename, num_workers, time_limit=time_limit)
+    decisions = sum(map(lambda x: x['decisions'], statistics['cube_results']))
+    result = None if status == UNKNOWN else status == SAT
+    return result, model, decisions, time.time() - start
+
+def run_archive(filename, **options):
+    """ Solves every CNF member of a tar archive, streamed from the (compressed) archive without extracting it
 
-        filename = filename.split('\\')[-1]
-        output_filename = OUTPUT_DIRECTORY + "results-" + filename.replace(".cnf", "") + ".txt"
-        output_contradiction_proof(all_proofs, all_clauses_involved, output_filename)
-        
-    return result, variable_assignment, assignment_list.branching_count, time_elapsed
+    :param options: keyword arguments passed to run()
+    yields: (member name, result of run())
+    """
+    for name, stream in iterate_archive(filename):
+        yield (name, run(name, stream=stream, **options))
+
+def status_of(result):
+    """ Converts the result of cdcl() (True / False / None) to SAT / UNSAT / UNKNOWN """
+    if result is None:
+        return UNKNOWN
+    return SAT if result else UNSAT
 
 def verify(variable_assignment, clauses):
-    """ Verifies a variable assignment against a list of clauses and outputs:
-    Evaluates the conjunction of the evaluation of each clause
+    """ Verifies a variable assignment against a list of clauses (or a ClauseMatrix of them) and outputs:
+    Evaluates the conjunction of the evaluation of each clause, see evaluation.py
         - True if SAT and False if UNSAT
     """
-    result = True
-    for clause in clauses:
-        result = result and clause.evaluate(variable_assignment)
-    return result
+    if not isinstance(clauses, ClauseMatrix):
+        clauses = clause_matrix(clauses)
+    falsified = clauses.falsified(variable_assignment)
+    if len(falsified) > 0:
+        logging.debug("The assignment falsifies " + str(len(falsified)) + " clauses, the first one is clause "
+            + str(falsified[0]))
+    return len(falsified) == 0
 
 def output_contradiction_proof(proofs, clauses, output_filename):
-    """ Logs the contradiction proof in the required format to a file """
-    # Sorts the clauses by order of increasing decision level
-    ordered_clauses = sorted(list(clauses), key=lambda x: x.decision_level)
-    if OUTPUT_RESULTS_TO_FILE:
-        if not os.path.exists(os.path.dirname(output_filename)):
-            try:
-                os.makedirs(os.path.dirname(output_filename))
-            except OSError as exc: # Guard against race condition
-                if exc.errno != errno.EEXIST:
-                    raise
-        output_file = open(output_filename, 'w')
-
-    # First segment - number of clauses used in proof
-    initial_line = "v " + str(len(ordered_clauses))
-    # logging.info(initial_line)
-    if OUTPUT_RESULTS_TO_FILE:
-        output_file.write(initial_line + "\n")
-
-    # Second segment - clauses and their unique ids
-    for i, clause in enumerate(ordered_clauses):
-        clause_identifier_line = str(i) + ": " + clause.output_format()
-        # logging.info(clause_identifier_line)
-        if OUTPUT_RESULTS_TO_FILE:
-            output_file.write(clause_identifier_line + "\n")
-
-    # Used to prevent duplicate proofs
-    proven_clauses = set()
-
-    # Third segment - proofs:
-    for previous_clause, propagated_by_clause, resultant_clause in proofs:
-        if resultant_clause in proven_clauses:
-            continue
-        proven_clauses.add(resultant_clause)
-        previous_id = ordered_clauses.index(previous_clause)
-        propagated_by_id = ordered_clauses.index(propagated_by_clause)
-        resultant_id = ordered_clauses.index(resultant_clause)
-        resolution_line = " ".join(map(str, [previous_id, propagated_by_id, resultant_id]))
-        # logging.info(resolution_line)
-        # logging.info(previous_clause.hidden_str() + ", " + propagated_by_clause.hidden_str() + " -> " + resultant_clause.hidden_str())
-        if OUTPUT_RESULTS_TO_FILE:
-            output_file.write(resolution_line + "\n")
-
-        if resultant_clause.is_empty_clause():
-            logging.info("Learnt Clause generated: " + resultant_clause.hidden_str())
-
+    """ Writes the contradiction proof in the resolution format to a file (with its directory):
+        - "v " followed by the number of clauses used in the proof
+        - "<id>: <clause>" for every clause used, by order of increasing decision level
+        - "<id> <id> <id>" for every resolution: the clause, the clause it was resolved with and the resolvent
+    """
+    ordered_clauses = sorted(clauses, key=lambda x: x.decision_level)
+    identifiers = dict(map(lambda x: (x[1], str(x[0])), enumerate(ordered_clauses)))
+    directory = os.path.dirname(output_filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_filename, 'w') as output_file:
+        output_file.write("v " + str(len(ordered_clauses)) + "\n")
+        for identifier, clause in enumerate(ordered_clauses):
+            output_file.write(str(identifier) + ": " + clause.output_format() + "\n")
+        # Every resolvent is only proven once
+        proven_clauses = set()
+        for previous_clause, propagated_by_clause, resultant_clause in proofs:
+            if resultant_clause in proven_clauses:
+                continue
+            proven_clauses.add(resultant_clause)
+            output_file.write(identifiers[previous_clause] + " " + identifiers[propagated_by_clause] + " "
+                + identifiers[resultant_clause] + "\n")
@@ -0,0 +1,388 @@
+""" DRAT proof checker, to trust UNSAT answers without an external tool
+
+A DRAT proof (see drat.py) is a list of lemmas and deletions. It refutes a formula if every lemma is implied by the
+formula and the lemmas before it (minus the deleted clauses), and unit propagation of the result gives a conflict.
+A lemma is implied if it is RUP (unit propagation of its negation gives a conflict), or else RAT on its first literal
+(every resolvent with a clause containing the negation of that literal is RUP).
+
+Checking is backward with core marking, as in drat-trim:
+    - forward pass: the clauses and lemmas are added (and deleted) in order, with unit propagation of the root level,
+      until the root level is in conflict
+    - the clauses that take part in that conflict are marked (core)
+    - backward pass: the lemmas are removed (and the deleted clauses put back) in reverse order, and only the marked
+      lemmas are checked, marking the clauses their check propagates with
+So lemmas that do not lead to the conflict are never checked. Propagation uses its own watched literals, and the
+deletion of a clause that is the reason of a root level literal is ignored (as drat-trim does with unit deletions).
+"""
+from drat import DRAT_BINARY, DRAT_TEXT
+import logging
+import time
+
+def dimacs_to_literal(value):
+    """ Converts a DIMACS integer to the integer encoding of the literals (2v, 2v + 1 for not v) """
+    if value < 0:
+        return (-value << 1) | 1
+    return value << 1
+
+def read_drat(proof, proof_format=None):
+    """ Reads a DRAT proof
+
+    :param proof: bytes, binary stream or file name of the proof
+    :param proof_format: DRAT_TEXT or DRAT_BINARY, detected if None (a binary proof has 0 bytes, a text one never does)
+    returns: list of (is deletion, list of integer encoded literals)
+    """
+    if isinstance(proof, str):
+        with open(proof, 'rb') as proof_file:
+            data = proof_file.read()
+    elif isinstance(proof, (bytes, bytearray)):
+        data = bytes(proof)
+    else:
+        data = proof.read()
+    if proof_format is None:
+        proof_format = DRAT_BINARY if b'\0' in data[:1024] else DRAT_TEXT
+    steps = []
+    if proof_format == DRAT_BINARY:
+        index = 0
+        size = len(data)
+        while index < size:
+            deletion = data[index] == 100 # 'd'
+            index += 1
+            literals = []
+            while True:
+                literal = 0
+                shift = 0
+                while True:
+                    byte = data[index]
+                    index += 1
+                    literal |= (byte & 127) << shift
+                    shift += 7
+                    if byte < 128:
+                        break
+                if literal == 0:
+                    break
+                literals.append(literal)
+            steps.append((deletion, literals))
+        return steps
+    for line in data.split(b'\n'):
+        tokens = line.split()
+        if len(tokens) == 0 or tokens[0] == b'c':
+            continue
+        deletion = tokens[0] == b'd'
+        if deletion:
+            tokens = tokens[1:]
+        steps.append((deletion, list(map(lambda x: dimacs_to_literal(int(x)), tokens[:-1]))))
+    return steps
+
+class DratChecker:
+    """ Checks a DRAT proof of a formula (see the module docstring)
+    Every clause and lemma gets an id, the index of its literals in clause_literals.
+
+    :attribute clause_literals: List of the literals of every clause (the formula first, then the lemmas)
+    :attribute num_original: Number of clauses of the formula
+    :attribute active: List of whether each clause is in the formula at the current step
+    :attribute core: List of whether each clause was marked as needed for the refutation
+    :attribute watches: List containing the ids of the clauses watching each literal, indexed by the literal
+    :attribute values: List of the values of the literals at the root level (True / False / None)
+    :attribute reasons: List of the id of the clause that implied each variable, None for an assumption
+    :attribute trail: List of the literals assigned at the root level (then the assumptions of a check)
+    :attribute head: Index of the next literal of the trail to propagate
+    :attribute conflict: id of a clause falsified at the root level, None if there is none
+    :attribute pivots: List of the first literal of every lemma as written in the proof (the literals of the clauses
+        are reordered by the watches), the pivot of its RAT check. None for the clauses of the formula and empty lemmas
+    :attribute short_clauses: Set of the ids of the active clauses with less than two literals (they are not watched)
+    :attribute proof_steps: List of (is deletion, literals) of the proof
+    :attribute steps: List of (is deletion, clause id) of the proof, the id is None for an ignored deletion
+    :attribute checked_count: Int counter of the lemmas checked
+    :attribute rat_count: Int counter of the lemmas that needed the RAT check
+    :attribute ignored_deletions: Int counter of the deletions ignored
+    :attribute failed_lemma: the literals of the lemma that could not be checked, None if there is none
+    :attribute error: message of why the proof was rejected, None if it was not
+    :attribute verified: result of check(), None before it
+    """
+
+    def __init__(self, clauses, proof_steps):
+        """ :param clauses: list of Clause (as returned by parse_cnf) of the formula
+        :param proof_steps: list of (is deletion, literals) as returned by read_drat
+        """
+        self.clause_literals = [list(dict.fromkeys(clause.literals)) for clause in clauses]
+        self.num_original = len(self.clause_literals)
+        self.proof_steps = proof_steps
+        max_literal = 1
+        for literals in self.clause_literals:
+            max_literal = max(max_literal, max(literals, default=0))
+        for _, literals in proof_steps:
+            max_literal = max(max_literal, max(literals, default=0))
+        num_variables = max_literal >> 1
+        self.active = []
+        self.core = []
+        self.pivots = []
+        self.watches = [[] for _ in range(2 * num_variables + 2)]
+        self.values = [None] * (2 * num_variables + 2)
+        self.reasons = [None] * (num_variables + 1)
+        self.trail = []
+        self.head = 0
+        self.conflict = None
+        self.short_clauses = set()
+        self.steps = []
+        self.checked_count = 0
+        self.rat_count = 0
+        self.ignored_deletions = 0
+        self.failed_lemma = None
+        self.error = None
+        self.verified = None
+
+    ######################################
+    # Clauses and root level propagation #
+    ######################################
+
+    def attach(self, clause_id):
+        """ Puts a clause in the formula: watches it, and assigns its literal if it is unit at the root level """
+        literals = self.clause_literals[clause_id]
+        self.active[clause_id] = True
+        values = self.values
+        # Literals that are not False first
+        literals.sort(key=lambda x: values[x] is False)
+        if len(literals) == 0 or values[literals[0]] is False:
+            if self.conflict is None:
+                self.conflict = clause_id
+        elif len(literals) == 1 or values[literals[1]] is False:
+            if values[literals[0]] is None and self.conflict is None:
+                self.assign(literals[0], clause_id)
+        if len(literals) >= 2:
+            self.watches[literals[0]].append(clause_id)
+            self.watches[literals[1]].append(clause_id)
+        else:
+            self.short_clauses.add(clause_id)
+
+    def detach(self, clause_id):
+        """ Takes a clause out of the formula, with the root level literals it implied (and the ones after them) """
+        literals = self.clause_literals[clause_id]
+        self.active[clause_id] = False
+        if len(literals) >= 2:
+            self.watches[literals[0]].remove(clause_id)
+            self.watches[literals[1]].remove(clause_id)
+        else:
+            self.short_clauses.discard(clause_id)
+        reset = self.conflict == clause_id
+        if len(literals) > 0 and self.reasons[literals[0] >> 1] == clause_id and self.values[literals[0]]:
+            self.unassign_from(self.trail.index(literals[0]))
+            reset = True
+        if reset:
+            # The literals left on the trail may imply more through the clauses that implied the removed ones
+            self.conflict = None
+            for short_id in self.short_clauses:
+                short_literals = self.clause_literals[short_id]
+                if len(short_literals) == 0 or self.values[short_literals[0]] is False:
+                    self.conflict = short_id
+                    return
+                if self.values[short_literals[0]] is None:
+                    self.assign(short_literals[0], short_id)
+            self.head = 0
+            self.conflict = self.propagate()
+
+    def assign(self, literal, reason):
+        self.values[literal] = True
+        self.values[literal ^ 1] = False
+        self.reasons[literal >> 1] = reason
+        self.trail.append(literal)
+
+    def unassign_from(self, position):
+        values = self.values
+        for literal in self.trail[position:]:
+            values[literal] = None
+            values[literal ^ 1] = None
+            self.reasons[literal >> 1] = None
+        del self.trail[position:]
+        self.head = min(self.head, position)
+
+    def propagate(self):
+        """ Propagates the literals of the trail that were not propagated yet
+        returns: the id of a falsified clause, None if there is none
+        """
+        trail = self.trail
+        values = self.values
+        watches = self.watches
+        clause_literals = self.clause_literals
+        while self.head < len(trail):
+            false_literal = trail[self.head] ^ 1
+            self.head += 1
+            watchers = watches[false_literal]
+            kept = []
+            conflict = None
+            for index, clause_id in enumerate(watchers):
+                literals = clause_literals[clause_id]
+                if literals[0] == false_literal:
+                    literals[0], literals[1] = literals[1], literals[0]
+                first_literal = literals[0]
+                if values[first_literal] is True:
+                    kept.append(clause_id)
+                    continue
+                for position in range(2, len(literals)):
+                    literal = literals[position]
+                    if values[literal] is not False:
+                        literals[1] = literal
+                        literals[position] = false_literal
+                        watches[literal].append(clause_id)
+                        break
+                else:
+                    kept.append(clause_id)
+                    if values[first_literal] is False:
+                        kept.extend(watchers[index + 1:])
+                        conflict = clause_id
+                        break
+                    self.assign(first_literal, clause_id)
+            watches[false_literal] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def mark_core(self, conflict=None, literal=None):
+        """ Marks the clauses of the implication graph of a conflict clause (or of a literal) as core """
+        reasons = self.reasons
+        clause_literals = self.clause_literals
+        core = self.core
+        stack = []
+        if conflict is not None:
+            core[conflict] = True
+            stack.extend(clause_literals[conflict])
+        if literal is not None:
+            stack.append(literal)
+        seen = set()
+        while len(stack) > 0:
+            variable = stack.pop() >> 1
+            if variable in seen:
+                continue
+            seen.add(variable)
+            reason = reasons[variable]
+            if reason is not None:
+                core[reason] = True
+                stack.extend(clause_literals[reason])
+
+    #############
+    # Checking #
+    #############
+
+    def check(self):
+        """ returns: whether the proof refutes the formula, see error and failed_lemma otherwise """
+        # Forward pass
+        clauses_by_literals = {} # { sorted literals -> [ids of the active clauses with these literals] }
+        for clause_id, literals in enumerate(self.clause_literals):
+            self.active.append(False)
+            self.core.append(False)
+            self.pivots.append(None)
+            clauses_by_literals.setdefault(tuple(sorted(literals)), []).append(clause_id)
+            self.attach(clause_id)
+        if self.conflict is None:
+            self.conflict = self.propagate()
+        for deletion, literals in self.proof_steps:
+            if self.conflict is not None:
+                break
+            key = tuple(sorted(set(literals)))
+            if deletion:
+                candidates = clauses_by_literals.get(key)
+                if not candidates:
+                    self.steps.append((True, None))
+                    continue
+                clause_id = candidates[-1]
+                clause = self.clause_literals[clause_id]
+                if len(clause) > 0 and self.reasons[clause[0] >> 1] == clause_id and self.values[clause[0]]:
+                    self.ignored_deletions += 1
+                    self.steps.append((True, None))
+                    continue
+                candidates.pop()
+                self.detach(clause_id)
+                self.steps.append((True, clause_id))
+            else:
+                clause_id = len(self.clause_literals)
+                self.clause_literals.append(list(dict.fromkeys(literals)))
+                self.active.append(False)
+                self.core.append(False)
+                self.pivots.append(literals[0] if len(literals) > 0 else None)
+                clauses_by_literals.setdefault(key, []).append(clause_id)
+                self.attach(clause_id)
+                self.steps.append((False, clause_id))
+                if self.conflict is None:
+                    self.conflict = self.propagate()
+        if self.conflict is None:
+            self.error = "the proof does not lead to a conflict"
+            return False
+        self.mark_core(conflict=self.conflict)
+
+        # Backward pass
+        for deletion, clause_id in reversed(self.steps):
+            if clause_id is None:
+                continue
+            if deletion:
+                self.attach(clause_id)
+                if self.conflict is None:
+                    self.conflict = self.propagate()
+                continue
+            self.detach(clause_id)
+            if self.core[clause_id] and not self.check_lemma(clause_id):
+                self.failed_lemma = list(map(lambda x: -(x >> 1) if x & 1 else x >> 1, self.clause_literals[clause_id]))
+                self.error = "lemma " + " ".join(map(str, self.failed_lemma)) + " 0 is neither RUP nor RAT"
+                return False
+        return True
+
+    def check_lemma(self, clause_id):
+        """ Checks a lemma that was taken out of the formula, marking the clauses its check uses """
+        self.checked_count += 1
+        literals = self.clause_literals[clause_id]
+        if self.is_rup(literals):
+            return True
+        pivot = self.pivots[clause_id]
+        if pivot is None:
+            return False
+        # RAT on the first literal: every resolvent with a clause containing its negation must be RUP
+        for other_id, other_literals in enumerate(self.clause_literals):
+            if not self.active[other_id] or pivot ^ 1 not in other_literals:
+                continue
+            resolvent = literals + list(filter(lambda x: x != pivot ^ 1, other_literals))
+            if not self.is_rup(resolvent):
+                return False
+            self.core[other_id] = True
+        self.rat_count += 1
+        return True
+
+    def is_rup(self, literals):
+        """ Whether unit propagation of the negation of the literals gives a conflict (the clauses used are marked) """
+        if self.conflict is not None:
+            self.mark_core(conflict=self.conflict)
+            return True
+        values = self.values
+        size = len(self.trail)
+        true_literal = None
+        for literal in literals:
+            value = values[literal]
+            if value is True:
+                true_literal = literal
+                break
+            if value is None:
+                self.assign(literal ^ 1, None)
+        conflict = None
+        if true_literal is None:
+            conflict = self.propagate()
+        if true_literal is not None:
+            self.mark_core(literal=true_literal)
+        elif conflict is not None:
+            self.mark_core(conflict=conflict)
+        self.unassign_from(size)
+        return true_literal is not None or conflict is not None
+
+    def core_lemma_count(self):
+        return sum(self.core[self.num_original:])
+
+    def core_clause_count(self):
+        return sum(self.core[:self.num_original])
+
+def check_proof(clauses, proof, proof_format=None):
+    """ Checks a DRAT proof of UNSAT for the clauses (see read_drat for the parameters)
+    returns: the DratChecker, after the check
+    """
+    start = time.time()
+    checker = DratChecker(clauses, read_drat(proof, proof_format))
+    checker.verified = checker.check()
+    logging.debug("Proof check: " + ("verified" if checker.verified else checker.error) + ", "
+        + str(checker.checked_count) + " lemmas checked, " + str(checker.core_clause_count()) + " core clauses in "
+        + str(round(time.time() - start, 3)) + "s")
+    return checker
@@ -0,0 +1,118 @@
+""" Learnt clause sharing between solver processes over shared memory
+
+Every worker owns a ring buffer in a multiprocessing.shared_memory block and is its only writer, so no locks are needed:
+    - positions: one int64 per worker, the total number of int32 slots its ring has been written with
+    - rings: one ring of RING_SLOTS int32 per worker, holding records [size, lbd, literal, ..., literal]
+A worker writes a record and then publishes it by advancing its position. The readers keep their own read position
+in every ring and, after copying the new records, check that the writer has not lapped them in the meantime;
+records that may have been overwritten are dropped instead of imported. A record that is being written is not
+published yet and may already cover the 2 + max_size slots after the published position, so a reader counts them as
+overwritten too.
+Clauses are only shared between workers solving the same formula (e.g. a portfolio), since they are implied by it.
+"""
+from multiprocessing import shared_memory
+
+RING_SLOTS = 1 << 16 # int32 slots in the ring of every worker
+SHARE_MAX_SIZE = 8 # Learnt clauses with more literals are not exported
+SHARE_MAX_LBD = 3 # Learnt clauses with a higher LBD are not exported
+
+def create_shared_memory(num_workers):
+    """ Creates the shared memory block for num_workers rings, the caller has to close() and unlink() it """
+    shared = shared_memory.SharedMemory(create=True, size=num_workers * (8 + 4 * RING_SLOTS))
+    shared.buf[:8 * num_workers] = bytes(8 * num_workers)
+    return shared
+
+class ClauseExchange:
+    """ The view of one worker on the shared rings
+
+    :attribute worker: Index of the worker, the ring it writes to
+    :attribute num_workers: Number of rings
+    :attribute positions: int64 memoryview of the write positions of all the rings
+    :attribute rings: int32 memoryviews of the rings
+    :attribute safe_lag: Highest number of slots a reader may lag behind a published position, the slots beyond it
+        may be overwritten by the record being written
+    :attribute read_positions: List of the positions up to which this worker has read every ring
+    :attribute exported: Int counter of the clauses written to the ring of this worker
+    :attribute imported: Int counter of the clauses read from the rings of the other workers
+    :attribute dropped: Int counter of the times records were overwritten before this worker could read them
+    """
+
+    def __init__(self, name, worker, num_workers, max_size=SHARE_MAX_SIZE, max_lbd=SHARE_MAX_LBD):
+        self.shared = shared_memory.SharedMemory(name=name)
+        self.worker = worker
+        self.num_workers = num_workers
+        self.max_size = max_size
+        self.max_lbd = max_lbd
+        buffer = self.shared.buf
+        self.positions = buffer[:8 * num_workers].cast('q')
+        self.rings = []
+        for index in range(num_workers):
+            start = 8 * num_workers + 4 * RING_SLOTS * index
+            self.rings.append(buffer[start:start + 4 * RING_SLOTS].cast('i'))
+        # Records the writer may be writing beyond its published position overwrite the oldest slots of the ring
+        self.safe_lag = RING_SLOTS - (2 + max_size)
+        self.write_position = self.positions[worker]
+        self.read_positions = [self.positions[index] for index in range(num_workers)]
+        self.exported = 0
+        self.imported = 0
+        self.dropped = 0
+
+    def export(self, clause):
+        """ Publishes a learnt clause (with its lbd set) if it is short enough and has a low enough LBD """
+        literals = clause.literals
+        size = len(literals)
+        if size > self.max_size or clause.lbd > self.max_lbd:
+            return
+        ring = self.rings[self.worker]
+        position = self.write_position
+        ring[position % RING_SLOTS] = size
+        ring[(position + 1) % RING_SLOTS] = clause.lbd
+        position += 2
+        for literal in literals:
+            ring[position % RING_SLOTS] = literal
+            position += 1
+        self.write_position = position
+        self.positions[self.worker] = position
+        self.exported += 1
+
+    def import_clauses(self):
+        """ returns: list of (literals, lbd) of the clauses published by the other workers since the last call """
+        clauses = []
+        for index in range(self.num_workers):
+            if index == self.worker:
+                continue
+            start = self.read_positions[index]
+            end = self.positions[index]
+            if end - start > self.safe_lag: # Lapped by the writer
+                self.dropped += 1
+                self.read_positions[index] = end
+                continue
+            ring = self.rings[index]
+            records = []
+            position = start
+            while position < end:
+                size = ring[position % RING_SLOTS]
+                lbd = ring[(position + 1) % RING_SLOTS]
+                if size < 1 or size > self.max_size or position + 2 + size > end:
+                    break
+                position += 2
+                records.append(([ring[(position + i) % RING_SLOTS] for i in range(size)], lbd))
+                position += size
+            # The records are only valid if the writer did not reach them again while they were copied
+            if self.positions[index] - start > self.safe_lag:
+                self.dropped += 1
+                self.read_positions[index] = self.positions[index]
+                continue
+            self.read_positions[index] = end
+            clauses.extend(records)
+        self.imported += len(clauses)
+        return clauses
+
+    def counts(self):
+        return {'exported': self.exported, 'imported': self.imported, 'dropped': self.dropped}
+
+    def close(self):
+        self.positions.release()
+        for ring in self.rings:
+            ring.release()
+        self.shared.close()
@@ -0,0 +1,222 @@
+""" Cube-and-conquer: the search space is split up front into cubes (partial assignments), which are then solved as
+independent cdcl() runs on a pool of worker processes
+
+The splitter decides the variables of a binary tree of the given depth, choosing every split variable either by its
+VSIDS score or by lookahead: both values of the best candidates (by VSIDS score) are propagated and the variable that
+implies the most literals on both sides wins. A value whose propagation conflicts is a failed literal, so the other
+value is implied and added to the cube, and a branch where both values fail is refuted without a cube.
+
+The formula is SAT as soon as one cube is SAT, and UNSAT once every cube is refuted.
+"""
+from cdcl import *
+import heapq
+import math
+import multiprocessing
+
+# Splitters
+SPLIT_VSIDS = 'vsids'
+SPLIT_LOOKAHEAD = 'lookahead'
+
+CUBES_PER_WORKER = 4 # The default depth gives about this many cubes per worker
+LOOKAHEAD_CANDIDATES = 10 # Variables with the highest VSIDS score that are looked ahead on
+
+class CubeSplitter:
+    """ Generates the cubes of a formula
+
+    :attribute assignment_list: AssignmentList holding the decisions of the current branch
+    :attribute propagator: WatchedLiterals of the formula
+    :attribute splitter: SPLIT_LOOKAHEAD or SPLIT_VSIDS
+    :attribute refuted_count: Int counter of the branches refuted while splitting
+    """
+
+    def __init__(self, assignment_list, clauses, splitter=SPLIT_LOOKAHEAD, candidates=LOOKAHEAD_CANDIDATES):
+        self.assignment_list = assignment_list
+        self.clauses = clauses
+        self.splitter = splitter
+        self.candidates = candidates
+        self.propagator = WatchedLiterals(assignment_list.num_variables)
+        self.refuted_count = 0
+
+    def cubes(self, depth):
+        """ returns: list of cubes (lists of literals), empty if the formula is refuted while splitting """
+        assignment_list = self.assignment_list
+        for clause in self.clauses:
+            if clause.is_empty_clause():
+                return []
+            if clause.is_unit_clause():
+                value = assignment_list.value_of(clause.literals[0])
+                if value is None:
+                    assignment_list.assign_literal(clause.literals[0], clause)
+                elif not value:
+                    return []
+            else:
+                self.propagator.watch(clause)
+        if self.propagator.propagate(assignment_list) is not None:
+            return []
+        cubes = []
+        self.split(depth, cubes)
+        return cubes
+
+    def split(self, depth, cubes):
+        """ Adds the cubes below the current branch, which opens depth more splits """
+        assignment_list = self.assignment_list
+        level = assignment_list.decision_level
+        if self.splitter == SPLIT_LOOKAHEAD:
+            variable = self.lookahead()
+        else:
+            variable = self.pick_vsids()
+        if variable is False: # Refuted by failed literals
+            self.refuted_count += 1
+        elif depth == 0 or variable is None:
+            cubes.append(list(map(lambda x: assignment_list.trail[x], assignment_list.trail_limits)))
+        else:
+            for literal in (variable << 1, (variable << 1) | 1):
+                assignment_list.decide(literal)
+                if self.propagator.propagate(assignment_list) is None:
+                    self.split(depth - 1, cubes)
+                else:
+                    self.refuted_count += 1
+                assignment_list.backtrack(assignment_list.decision_level - 1)
+        # Undo the failed literals added by the lookahead
+        assignment_list.backtrack(level)
+
+    def unassigned_variables(self):
+        values = self.assignment_list.values
+        return filter(lambda x: values[x << 1] is None, self.assignment_list.variables)
+
+    def score(self, variable):
+        vsids = self.assignment_list.vsids
+        return max(vsids[variable << 1], vsids[(variable << 1) | 1])
+
+    def pick_vsids(self):
+        """ returns: the unassigned variable with the highest VSIDS score, None if every variable is assigned """
+        return max(self.unassigned_variables(), key=self.score, default=None)
+
+    def propagation_count(self, literal):
+        """ returns: the number of literals implied by deciding the literal, None if it conflicts """
+        assignment_list = self.assignment_list
+        size = len(assignment_list.trail)
+        assignment_list.decide(literal)
+        conflict = self.propagator.propagate(assignment_list)
+        count = len(assignment_list.trail) - size
+        assignment_list.backtrack(assignment_list.decision_level - 1)
+        return None if conflict is not None else count
+
+    def lookahead(self):
+        """ Looks ahead on the candidate variables, failed literals are added to the branch as decisions
+
+        returns: the variable that maximises the product of the propagation counts of its two values,
+            None if every variable is assigned, False if the branch is refuted
+        """
+        assignment_list = self.assignment_list
+        while True:
+            candidates = heapq.nlargest(self.candidates, self.unassigned_variables(), key=self.score)
+            if len(candidates) == 0:
+                return None
+            best = None
+            best_score = -1
+            failed_literal = None
+            for variable in candidates:
+                positive = self.propagation_count(variable << 1)
+                negative = self.propagation_count((variable << 1) | 1)
+                if positive is None and negative is None:
+                    return False
+                if positive is None or negative is None:
+                    failed_literal = variable << 1 if positive is None else (variable << 1) | 1
+                    break
+                score = (positive * negative << 10) + positive + negative
+                if score > best_score:
+                    best = variable
+                    best_score = score
+            if failed_literal is None:
+                return best
+            # The other value is implied by the branch
+            assignment_list.decide(failed_literal ^ 1)
+            if self.propagator.propagate(assignment_list) is not None:
+                return False
+
+#######################################
+# Worker processes solving the cubes #
+#######################################
+
+# Formula, stop event and deadline of a worker process, set by initialize_worker
+worker_clauses = None
+worker_stop = None
+worker_deadline = None
+
+def initialize_worker(filename, stop, deadline):
+    global worker_clauses, worker_stop, worker_deadline
+    _, worker_clauses = parse_cnf(filename)
+    worker_stop = stop
+    worker_deadline = deadline
+
+def solve_cube(task):
+    """ Solves the formula under a cube (added as unit clauses) with an independent cdcl() run
+    :param task: (cube index, cube)
+    returns: dictionary with the cube index, cube, status, model (for SAT), time, decisions and conflicts
+    """
+    index, cube = task
+    result = {'cube': index, 'literals': list(map(literal_to_string, cube)), 'status': UNKNOWN, 'model': None,
+        'time': 0, 'decisions': 0, 'conflicts': 0}
+    if worker_stop.is_set():
+        return result
+    start = time.time()
+    clauses = worker_clauses + list(map(lambda x: Clause([x]), cube))
+    assignment_list = AssignmentList(clauses)
+    clause_database = ClauseDatabase(record_proof=False)
+    time_limit = None if worker_deadline is None else worker_deadline - start
+    limits = SearchLimits(time_limit=time_limit, stop=worker_stop)
+    satisfiable, assignment_list, _ = cdcl(assignment_list, clauses, clause_database=clause_database,
+        restart_policy=make_restart_policy(GLUCOSE), limits=limits)
+    result['status'] = status_of(satisfiable)
+    if satisfiable:
+        result['model'] = assignment_list.get_variable_assignment()
+    result['time'] = time.time() - start
+    result['decisions'] = assignment_list.branching_count
+    result['conflicts'] = clause_database.conflicts
+    return result
+
+def run_cube_and_conquer(filename, num_workers=None, depth=None, splitter=SPLIT_LOOKAHEAD, time_limit=None):
+    """ Solves a DIMACS file by cube-and-conquer
+
+    :param num_workers: number of worker processes, defaults to the number of cores
+    :param depth: number of splits of every cube, defaults to about CUBES_PER_WORKER cubes per worker
+    :param splitter: SPLIT_LOOKAHEAD or SPLIT_VSIDS
+    :param time_limit: wall-clock seconds after which the result is UNKNOWN
+    returns: (status, model, statistics)
+        - status: SAT, UNSAT or UNKNOWN
+        - model: variable assignment (as returned by AssignmentList.get_variable_assignment) for SAT, None otherwise
+        - statistics: dictionary with the number of cubes, branches refuted while splitting, the splitting time
+            and the result of every cube that was solved
+    """
+    start = time.time()
+    num_workers = num_workers or os.cpu_count()
+    if depth is None:
+        depth = max(1, math.ceil(math.log2(num_workers * CUBES_PER_WORKER)))
+    assignment_list, clauses = parse_cnf(filename)
+    cube_splitter = CubeSplitter(assignment_list, clauses, splitter)
+    cubes = cube_splitter.cubes(depth)
+    statistics = {'cubes': len(cubes), 'refuted_while_splitting': cube_splitter.refuted_count,
+        'split_time': time.time() - start, 'cube_results': []}
+    logging.info("Split into " + str(len(cubes)) + " cubes, " + str(cube_splitter.refuted_count) + " branches refuted")
+
+    status = UNSAT
+    model = None
+    stop = multiprocessing.Event()
+    deadline = None if time_limit is None else start + time_limit
+    with multiprocessing.Pool(num_workers, initialize_worker, (filename, stop, deadline)) as pool:
+        for result in pool.imap_unordered(solve_cube, enumerate(cubes)):
+            statistics['cube_results'].append(result)
+            if result['status'] == SAT:
+                status = SAT
+                model = result['model']
+                # The cubes still running stop after their next conflict, the queued ones return immediately
+                stop.set()
+                break
+            if result['status'] != UNSAT:
+                status = UNKNOWN
+        pool.close()
+        pool.join()
+    if status == SAT and not verify(model, clauses):
+        logging.error("The model of cube " + str(statistics['cube_results'][-1]['cube']) + " does not satisfy the formula")
+    return (status, model, statistics)
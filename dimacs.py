@@ -0,0 +1,174 @@
+""" Streaming DIMACS CNF parser
+
+The input is read in large chunks and only split into lines where a comment, the 'p cnf' header or the '%' trailer
+of the SATLIB files occurs. Everything else is a stream of integers where 0 ends a clause, so clauses may span
+lines or share a line. The literals are encoded as integers (see structures.py) straight from the tokens, and the clauses
+are found with iterator pipelines instead of a Python loop over every clause.
+"""
+import re
+import os
+import gzip
+import bz2
+import lzma
+import tarfile
+from array import array
+from itertools import compress, count
+from operator import not_, sub
+
+CHUNK_SIZE = 1 << 20
+CNF_EXTENSION = '.cnf'
+# Compressed files are decompressed on the fly, by file extension
+DECOMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+ARCHIVE_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+# Number of variables up to which the literal table is filled from the header, larger variables are added lazily
+RESERVE_LIMIT = 1 << 16
+
+# Lines that are not part of the clauses: comments, the problem line and the end of formula marker
+SKIPPED_LINE = re.compile(rb'^[ \t]*([cp%])[^\n]*', re.M)
+HEADER = re.compile(rb'p[ \t]+cnf[ \t]+(\d+)[ \t]+(\d+)')
+
+class LiteralTable(dict):
+    """ Maps DIMACS tokens (bytes) to encoded literals, e.g. b'-3' -> 7 and the terminating b'0' -> 0
+    Looking a token up is much cheaper than int() followed by the encoding. The table is shared by every parse,
+    since the same tokens occur in every file of a benchmark.
+
+    :attribute num_variables: The variables up to which the table has been filled
+    """
+
+    def __init__(self):
+        super().__init__({b'0': 0})
+        self.num_variables = 0
+
+    def __missing__(self, token):
+        value = int(token)
+        literal = value << 1 if value >= 0 else (-value << 1) | 1
+        self[token] = literal
+        return literal
+
+    def reserve(self, num_variables):
+        """ Fills in the tokens of the variables up to num_variables (from the header, up to RESERVE_LIMIT) """
+        num_variables = min(num_variables, RESERVE_LIMIT)
+        for variable in range(self.num_variables + 1, num_variables + 1):
+            token = str(variable).encode()
+            self[token] = variable << 1
+            self[b'-' + token] = (variable << 1) | 1
+        self.num_variables = max(self.num_variables, num_variables)
+
+LITERALS = LiteralTable()
+
+def parse_dimacs(stream, chunk_size=CHUNK_SIZE):
+    """ Parses a DIMACS CNF from a binary stream (a file opened with 'rb' or a decompressor)
+
+    returns: (num_variables, literals, offsets)
+        - literals: array('i') of the encoded literals of all the clauses, without the terminating zeros
+        - offsets: array('i') where clause i is literals[offsets[i]:offsets[i + 1]]
+        num_variables is taken from the header (or the largest variable if it is larger)
+    """
+    num_variables = 0
+    literals = array('i')
+    offsets = array('i', [0])
+    leftover = b''
+    finished = False
+    while not finished:
+        chunk = stream.read(chunk_size)
+        if chunk:
+            data = leftover + chunk
+            # Only complete lines are parsed, the rest is kept for the next chunk
+            end = data.rfind(b'\n') + 1
+            leftover = data[end:]
+            data = data[:end]
+        else:
+            data = leftover
+            finished = True
+
+        pieces = []
+        start = 0
+        for match in SKIPPED_LINE.finditer(data):
+            pieces.append(data[start:match.start()])
+            start = match.end()
+            kind = match.group(1)
+            if kind == b'p':
+                header = HEADER.search(match.group(0))
+                if header is not None:
+                    num_variables = int(header.group(1))
+                    LITERALS.reserve(num_variables)
+            elif kind == b'%':
+                start = len(data)
+                finished = True
+                break
+        if start == 0:
+            tokens = data.split()
+        else:
+            pieces.append(data[start:])
+            tokens = b' '.join(pieces).split()
+
+        # The terminating zeros are encoded as 0, which is not a literal since variables start at 1
+        encoded = list(map(LITERALS.__getitem__, tokens))
+        # The k-th zero of the chunk at index i ends a clause at offset len(literals) + i - k,
+        # a clause that is not ended yet simply continues in the next chunk
+        zeros = compress(count(), map(not_, encoded))
+        offsets.fromlist(list(map(sub, zeros, count(-len(literals)))))
+        literals.fromlist(list(filter(None, encoded)))
+
+    # Last clause without a terminating zero
+    if offsets[-1] != len(literals):
+        offsets.append(len(literals))
+    if len(literals) > 0:
+        num_variables = max(num_variables, max(literals) >> 1)
+    return (num_variables, literals, offsets)
+
+def clause_literals(literals, offsets):
+    """ Splits the flat literal array into a list of literal lists, one per clause """
+    literal_list = literals.tolist()
+    return [literal_list[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+######################################
+# Compressed files and tar archives #
+######################################
+
+def open_cnf(file, name=None):
+    """ Opens a CNF as a binary stream that is decompressed on the fly if it ends with .gz, .bz2 or .xz
+
+    :param file: a filename, or a binary stream (e.g. a member of a tar archive)
+    :param name: the name that decides the decompressor, defaults to the filename
+    """
+    if name is None:
+        name = file
+    for extension, open_function in DECOMPRESSORS.items():
+        if name.endswith(extension):
+            return open_function(file, 'rb')
+    if isinstance(file, str):
+        return open(file, 'rb')
+    return file
+
+def strip_compression(name):
+    """ Removes the compression extension (.gz, .bz2 or .xz) from a name """
+    for extension in DECOMPRESSORS:
+        if name.endswith(extension):
+            return name[:-len(extension)]
+    return name
+
+def is_cnf(name):
+    """ Whether the name is a CNF file, compressed or not """
+    return strip_compression(name).endswith(CNF_EXTENSION)
+
+def is_archive(name):
+    return name.endswith(ARCHIVE_EXTENSIONS)
+
+def instance_name(name):
+    """ Name of an instance without its directory and extensions, e.g. 'uf20/uf20-01.cnf.gz' -> 'uf20-01' """
+    name = os.path.basename(strip_compression(name))
+    if name.endswith(CNF_EXTENSION):
+        name = name[:-len(CNF_EXTENSION)]
+    return name
+
+def iterate_archive(filename):
+    """ Iterates over the CNF members of a tar archive (compressed or not) in a single pass over the stream,
+    nothing is extracted to disk
+
+    yields: (member name, binary stream of the member), the stream can only be read until the next member is yielded
+    """
+    with tarfile.open(filename, 'r|*') as archive:
+        for member in archive:
+            if member.isfile() and is_cnf(member.name):
+                yield (member.name, open_cnf(archive.extractfile(member), member.name))
@@ -0,0 +1,86 @@
+""" DRAT proofs of UNSAT answers, streamed to a file (or any binary stream) while the solver runs
+
+Every clause the solver derives is written as a lemma when it is learnt, and every learnt clause it deletes as a
+deletion, so the proof is never kept in memory and costs time linear in its size. A DRAT checker (drat-trim, or
+checker.py) replays it on the original formula: every lemma must follow from the formula and the lemmas before it by
+unit propagation (RUP), and the proof of an UNSAT answer ends with the empty clause.
+
+Formats:
+    - DRAT_TEXT: one line per lemma "1 -2 0" and per deletion "d 1 -2 0", with DIMACS literals
+    - DRAT_BINARY: 'a' (lemma) or 'd' (deletion), then every literal as the variable-length unsigned integer (7 bits
+      per byte, lowest first, high bit set on every byte but the last) of 2 * variable + (1 if negated), then 0.
+      This is exactly the integer encoding of the literals in the solver.
+"""
+import os
+
+DRAT_TEXT = 'drat'
+DRAT_BINARY = 'binary-drat'
+PROOF_BUFFER_SIZE = 1 << 16 # Bytes buffered before writing to the sink
+
+class DratWriter:
+    """ Writes the lemmas and deletions of a DRAT proof to a binary sink, through a buffer
+
+    :attribute sink: writable binary stream
+    :attribute binary: whether the binary format is written instead of the text one
+    :attribute owns_sink: whether close() also closes the sink (it was opened by open_proof)
+    :attribute buffer: bytearray of the output not written to the sink yet
+    :attribute lemma_count: Int counter of the lemmas written
+    :attribute deletion_count: Int counter of the deletions written
+    """
+
+    def __init__(self, sink, binary=False, owns_sink=False):
+        self.sink = sink
+        self.binary = binary
+        self.owns_sink = owns_sink
+        self.buffer = bytearray()
+        self.lemma_count = 0
+        self.deletion_count = 0
+
+    def add(self, literals):
+        """ Writes a derived clause (of integer encoded literals) """
+        self.lemma_count += 1
+        self.write(b'a', b'', literals)
+
+    def delete(self, literals):
+        """ Writes the deletion of a clause (of integer encoded literals) """
+        self.deletion_count += 1
+        self.write(b'd', b'd ', literals)
+
+    def write(self, binary_prefix, text_prefix, literals):
+        buffer = self.buffer
+        if self.binary:
+            buffer += binary_prefix
+            for literal in literals:
+                while literal > 127:
+                    buffer.append((literal & 127) | 128)
+                    literal >>= 7
+                buffer.append(literal)
+            buffer.append(0)
+        else:
+            buffer += text_prefix
+            for literal in literals:
+                buffer += b'-%d ' % (literal >> 1) if literal & 1 else b'%d ' % (literal >> 1)
+            buffer += b'0\n'
+        if len(buffer) >= PROOF_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.sink.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self.owns_sink:
+            self.sink.close()
+        else:
+            self.sink.flush()
+
+def open_proof(sink, proof_format=DRAT_TEXT):
+    """ Returns a DratWriter to a file name (created with its directory) or to an open binary stream """
+    binary = proof_format == DRAT_BINARY
+    if isinstance(sink, (str, bytes)) or hasattr(sink, '__fspath__'):
+        directory = os.path.dirname(sink)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return DratWriter(open(sink, 'wb'), binary, owns_sink=True)
+    return DratWriter(sink, binary)
@@ -1,12 +1,17 @@
-from cdcl import run
+from cdcl import run, SearchStatistics
 import sys
 import json
 
 filepath = sys.argv[1]
 output_path = sys.argv[2]
+# Optional: file the search statistics are written to as JSON
+statistics_path = sys.argv[3] if len(sys.argv) > 3 else None
 ref_path = "reference.txt"
 
-result, assignment_list, branching_count, time_elapsed = run(filepath)
+statistics = SearchStatistics()
+result, assignment_list, branching_count, time_elapsed = run(filepath, statistics=statistics)
+if statistics_path:
+    statistics.dump(statistics_path)
 
 res_file = open(output_path, "w+")
 true_vals = {}
@@ -36,3 +41,4 @@ print("Satisfiability: ", result)
 print("Assignment List: ", true_vals)
 print("Branching count: ", branching_count)
 print("Time elapsed: ", time_elapsed)
+print("Statistics: ", json.dumps(statistics.to_dict()))
@@ -0,0 +1,120 @@
+""" Evaluation of clauses against models, over a CSR (compressed sparse row) layout of the clauses
+
+The literals of every clause are kept in one flat array, and clause i is literals[offsets[i]:offsets[i + 1]] (the
+layout parse_dimacs returns). With NumPy, a model or a whole matrix of candidate models is evaluated in a few
+vectorized operations: the truth values of all the literals are gathered at once, and every clause is the OR of its
+segment (numpy.logical_or.reduceat). Without NumPy, every clause is evaluated in Python, up to its first True literal.
+
+Models are either variable assignments { variable string -> True / False } (AssignmentList.get_variable_assignment)
+or rows of values indexed by variable (index 0 is unused), one row per model.
+"""
+from array import array
+from itertools import accumulate, chain
+from dimacs import clause_literals
+try:
+    import numpy
+except ImportError: # Optional, the clauses are evaluated in Python without it
+    numpy = None
+
+class ClauseMatrix:
+    """ Clauses in CSR layout, evaluated against models
+
+    :attribute literals: flat array of the integer encoded literals of every clause
+    :attribute offsets: array of the len(clauses) + 1 offsets of the clauses in literals
+    :attribute num_variables: highest variable of the clauses, the models are only read up to it
+    :attribute non_empty: (NumPy) bool array of the clauses that have literals, an empty clause is always False
+    :attribute starts: (NumPy) offsets of the non empty clauses, the segments reduced by reduceat
+    :attribute segments: (Python) list of the literal lists of the clauses
+    """
+
+    def __init__(self, literals, offsets, num_variables=None):
+        if num_variables is None:
+            num_variables = max(literals) >> 1 if len(literals) > 0 else 0
+        self.num_variables = num_variables
+        if numpy is not None:
+            self.literals = numpy.asarray(literals, dtype=numpy.intp)
+            self.offsets = numpy.asarray(offsets, dtype=numpy.intp)
+            self.non_empty = numpy.diff(self.offsets) > 0
+            self.starts = self.offsets[:-1][self.non_empty]
+        else:
+            self.literals = literals
+            self.offsets = offsets
+            self.segments = clause_literals(array('i', literals), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def falsified(self, models):
+        """ :param models: a model, or a list (or 2D array) of rows of values, one per model
+        returns: the list of the indices of the clauses the model falsifies, or one such list per row
+        """
+        single = isinstance(models, dict)
+        if numpy is not None:
+            single = single or numpy.ndim(models) == 1
+            indices = list(map(lambda x: numpy.flatnonzero(x).tolist(), self.falsified_mask(models)))
+        else:
+            if not single:
+                single = len(models) > 0 and not hasattr(models[0], '__len__')
+            rows = [models] if single else models
+            indices = list(map(lambda x: self.falsified_segments(self.literal_values(x)), rows))
+        return indices[0] if single else indices
+
+    def count_falsified(self, models):
+        """ returns: the number of clauses every row of models falsifies, as a list """
+        if numpy is not None:
+            return self.falsified_mask(models).sum(axis=1).tolist()
+        return list(map(len, self.falsified(list(models))))
+
+    def falsified_mask(self, models):
+        """ (NumPy) returns: bool matrix (number of models, number of clauses) of the falsified clauses """
+        truth = self.truth_matrix(models)
+        literal_truth = truth[:, self.literals]
+        satisfied = numpy.zeros((len(truth), len(self)), dtype=bool)
+        if len(self.starts) > 0:
+            satisfied[:, self.non_empty] = numpy.logical_or.reduceat(literal_truth, self.starts, axis=1)
+        return ~satisfied
+
+    def truth_matrix(self, models):
+        """ (NumPy) returns: bool matrix (number of models, 2 * (num_variables + 1)) of the value of every literal
+        A variable missing from a variable assignment makes both of its literals False.
+        """
+        width = self.num_variables + 1
+        if isinstance(models, dict):
+            truth = numpy.zeros((1, 2 * width), dtype=bool)
+            variables = numpy.fromiter(map(int, models.keys()), dtype=numpy.intp, count=len(models))
+            values = numpy.fromiter(models.values(), dtype=bool, count=len(models))
+            kept = variables < width
+            truth[0, (variables[kept] << 1) | ~values[kept]] = True
+            return truth
+        values = numpy.asarray(models, dtype=bool)
+        if values.ndim == 1:
+            values = values[None]
+        values = values[:, :width]
+        truth = numpy.empty((len(values), 2 * width), dtype=bool)
+        truth[:, 0::2] = values
+        truth[:, 1::2] = ~values
+        return truth
+
+    def literal_values(self, model):
+        """ (Python) returns: list of the value of every literal in a single model, see truth_matrix """
+        width = self.num_variables + 1
+        truth = [False] * (2 * width)
+        if isinstance(model, dict):
+            for variable, value in model.items():
+                variable = int(variable)
+                if variable < width:
+                    truth[(variable << 1) | (not value)] = True
+        else:
+            for variable, value in enumerate(model[:width]):
+                truth[(variable << 1) | (not value)] = True
+        return truth
+
+    def falsified_segments(self, truth):
+        """ (Python) returns: the indices of the clauses with no True literal """
+        return [i for i, segment in enumerate(self.segments) if not any(map(truth.__getitem__, segment))]
+
+def clause_matrix(clauses):
+    """ Lays out a list of Clause in a ClauseMatrix """
+    literals = array('i', chain.from_iterable(map(lambda x: x.literals, clauses)))
+    offsets = array('i', accumulate(map(lambda x: len(x.literals), clauses), initial=0))
+    return ClauseMatrix(literals, offsets)
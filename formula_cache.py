@@ -0,0 +1,150 @@
+""" On-disk cache of parsed formulas in a compact binary format
+
+A cache entry is the output of dimacs.parse_dimacs, keyed by the hash of the CNF file as stored:
+    - header: magic, format version, number of variables, number of clauses, number of literals
+    - offsets: (number of clauses + 1) little-endian int32, clause i is literals[offsets[i]:offsets[i + 1]]
+    - literals: (number of literals) little-endian int32 encoded literals
+Loading an entry is two array.fromfile reads, no text is parsed.
+The cache directory is bounded in size, the least recently used entries are evicted first.
+"""
+import os
+import sys
+import struct
+import hashlib
+import logging
+import tempfile
+from array import array
+
+FORMULA_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'cdcl-formulas')
+FORMULA_CACHE_SIZE_LIMIT = 256 << 20 # Bytes
+
+MAGIC = b'CNFB'
+VERSION = 1
+HEADER = struct.Struct('<4sIIII')
+ENTRY_EXTENSION = '.cnfb'
+
+def content_key(data):
+    """ Returns the cache key of the bytes of a CNF file """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def write_formula(file, num_variables, literals, offsets):
+    """ Writes the arrays returned by dimacs.parse_dimacs to a binary file """
+    file.write(HEADER.pack(MAGIC, VERSION, num_variables, len(offsets) - 1, len(literals)))
+    if sys.byteorder == 'big':
+        offsets = array('i', offsets)
+        literals = array('i', literals)
+        offsets.byteswap()
+        literals.byteswap()
+    offsets.tofile(file)
+    literals.tofile(file)
+
+def read_formula(file):
+    """ Reads a formula written by write_formula
+    returns: (num_variables, literals, offsets) as returned by dimacs.parse_dimacs
+    """
+    magic, version, num_variables, num_clauses, num_literals = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version " + str(VERSION) + " formula file")
+    offsets = array('i')
+    offsets.fromfile(file, num_clauses + 1)
+    literals = array('i')
+    literals.fromfile(file, num_literals)
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+        literals.byteswap()
+    return (num_variables, literals, offsets)
+
+class FormulaCache:
+    """ Directory of binary formulas keyed by the content hash of their CNF file
+    Entries are written atomically, so several processes can share the directory.
+    The modification time of an entry is its last use, which orders the LRU eviction.
+
+    :attribute directory: The cache directory, created when the first entry is stored
+    :attribute size_limit: The total size (in bytes) of the entries that is kept after storing a new one
+    :attribute total_size: Estimate of the total size of the entries, the directory is only scanned when it exceeds size_limit
+    :attribute hits: Int counter of the formulas loaded from the cache
+    :attribute misses: Int counter of the formulas that were not in the cache
+    """
+
+    def __init__(self, directory=FORMULA_CACHE_DIRECTORY, size_limit=FORMULA_CACHE_SIZE_LIMIT):
+        self.directory = directory
+        self.size_limit = size_limit
+        self.total_size = None
+        self.hits = 0
+        self.misses = 0
+
+    def path_of(self, key):
+        return os.path.join(self.directory, key + ENTRY_EXTENSION)
+
+    def get(self, key):
+        """ returns: (num_variables, literals, offsets) of the cached formula, None if it is not cached """
+        path = self.path_of(key)
+        try:
+            with open(path, 'rb') as file:
+                formula = read_formula(file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (ValueError, EOFError, struct.error):
+            logging.warning("Removing the invalid formula cache entry " + path)
+            self.remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError: # Evicted by another process in the meantime
+            pass
+        self.hits += 1
+        return formula
+
+    def put(self, key, num_variables, literals, offsets):
+        """ Stores a formula, then evicts the least recently used entries above the size limit """
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                write_formula(file, num_variables, literals, offsets)
+                size = file.tell()
+            os.replace(temporary_path, self.path_of(key))
+        except BaseException:
+            self.remove(temporary_path)
+            raise
+        if self.total_size is not None:
+            self.total_size += size
+        if self.total_size is None or self.total_size > self.size_limit:
+            self.evict()
+
+    def evict(self):
+        """ Removes the least recently used entries until the entries fit in size_limit
+        (entries stored by other processes are only seen here, when the directory is scanned)
+        """
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(ENTRY_EXTENSION):
+                status = entry.stat()
+                entries.append((status.st_mtime, status.st_size, entry.path))
+                total_size += status.st_size
+        if total_size > self.size_limit:
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= self.size_limit:
+                    break
+                self.remove(path)
+                total_size -= size
+        self.total_size = total_size
+
+    def clear(self):
+        """ Removes every entry """
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(ENTRY_EXTENSION):
+                    self.remove(entry.path)
+        self.total_size = 0
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError: # Removed by another process
+            pass
@@ -0,0 +1,268 @@
+""" Stochastic local search (ProbSAT, or WalkSAT) for satisfiable instances
+
+Starting from a random assignment, a clause falsified by the assignment is picked at random and one of its variables
+is flipped, until no clause is falsified. The variable is chosen from the break counts of its literals, the number of
+clauses that would become False if the variable was flipped:
+    - PROBSAT: with probability proportional to cb ^ -break (cb depends on the length of the clauses)
+    - WALKSAT: a variable with a break count of 0 if there is one, otherwise a random variable with probability
+      WALKSAT_NOISE and one with the lowest break count otherwise
+The break counts are updated incrementally: every clause keeps its number of True literals and the XOR of them, which
+is its only True literal (its critical literal) when there is one, so a flip only visits the clauses of the two
+literals of the variable. The clauses and the occurrences of every literal are kept in flat arrays (CSR layout).
+After RESTART_FLIPS flips without a model the search restarts from a new random assignment.
+
+Local search cannot show that a formula is UNSAT, it only gives up on a limit. Its best assignment (the one with the
+fewest falsified clauses) can be handed to cdcl() as initial phases instead.
+"""
+from array import array
+from itertools import accumulate, chain
+import random
+import time
+
+PROBSAT = 'probsat'
+WALKSAT = 'walksat'
+LOCAL_SEARCH_ALGORITHMS = (PROBSAT, WALKSAT)
+# ProbSAT exponential break values: (longest clause length, cb), from Balint and Schoening
+PROBSAT_CB = ((3, 2.5), (5, 3.7), (7, 5.4))
+WALKSAT_NOISE = 0.567
+RESTART_FLIPS = 100000 # Flips without a model before a restart from a new random assignment
+LIMIT_CHECK_INTERVAL = 4096 # Flips between two checks of the SearchLimits
+
+class LocalSearch:
+    """ ProbSAT / WalkSAT local search over a list of clauses
+
+    :attribute algorithm: PROBSAT or WALKSAT
+    :attribute num_variables: highest variable of the clauses
+    :attribute random: random.Random of the search
+    :attribute restart_interval: Number of flips without a model before a restart
+    :attribute empty_clause: whether one of the clauses is empty, the search then gives up immediately
+    :attribute literals: array of the integer encoded literals of every clause (duplicates and tautologies removed)
+    :attribute offsets: array of the offsets of the clauses in literals
+    :attribute occurrences: array of the indices of the clauses of every literal
+    :attribute occurrence_offsets: array of the offsets of the occurrences of every literal, indexed by literal
+    :attribute probabilities: List of the ProbSAT weight of every break count
+    :attribute true: List of the value of every literal in the current assignment, indexed by literal
+    :attribute true_count: List of the number of True literals of every clause
+    :attribute critical: List of the XOR of the True literals of every clause
+    :attribute break_count: List of the break count of every variable
+    :attribute unsat: List of the clauses falsified by the current assignment
+    :attribute unsat_position: List of the index of every clause in unsat, -1 if it is not falsified
+    :attribute try_flips: Number of flips since the last restart
+    :attribute best_values: List of the values (indexed by variable) of the assignment with the fewest falsified clauses
+    :attribute best_unsat_count: Number of clauses falsified by best_values
+    :attribute flips: Int counter of the flips
+    :attribute restarts: Int counter of the restarts
+    :attribute search_time: Seconds spent in solve()
+    """
+
+    def __init__(self, clauses, num_variables=0, algorithm=PROBSAT, seed=0, restart_interval=RESTART_FLIPS):
+        """ :param clauses: list of Clause """
+        self.algorithm = algorithm
+        self.random = random.Random(seed)
+        self.restart_interval = restart_interval
+        literal_lists = []
+        self.empty_clause = False
+        for clause in clauses:
+            literals = list(dict.fromkeys(clause.literals))
+            if any(map(lambda x: x ^ 1 in literals, literals)): # Tautology
+                continue
+            self.empty_clause = self.empty_clause or len(literals) == 0
+            literal_lists.append(literals)
+        self.literals = array('i', chain.from_iterable(literal_lists))
+        self.offsets = array('i', accumulate(map(len, literal_lists), initial=0))
+        if len(self.literals) > 0:
+            num_variables = max(num_variables, max(self.literals) >> 1)
+        self.num_variables = num_variables
+
+        counts = [0] * (2 * (num_variables + 1))
+        for literal in self.literals:
+            counts[literal] += 1
+        self.occurrence_offsets = array('i', accumulate(counts, initial=0))
+        self.occurrences = array('i', [0]) * len(self.literals)
+        positions = self.occurrence_offsets.tolist()
+        for index, literals in enumerate(literal_lists):
+            for literal in literals:
+                self.occurrences[positions[literal]] = index
+                positions[literal] += 1
+
+        longest = max(map(len, literal_lists), default=0)
+        cb = next((x[1] for x in PROBSAT_CB if longest <= x[0]), PROBSAT_CB[-1][1])
+        self.probabilities = [cb ** -x for x in range(max(counts, default=0) + 1)]
+        self.true = None
+        self.try_flips = 0
+        self.best_values = None
+        self.best_unsat_count = len(literal_lists) + 1
+        self.flips = 0
+        self.restarts = 0
+        self.search_time = 0
+
+    def restart(self):
+        """ Starts again from a random assignment, recomputing the counts of every clause """
+        num_variables = self.num_variables
+        literals = self.literals
+        offsets = self.offsets
+        value = self.random.random
+        true = [False] * (2 * (num_variables + 1))
+        for variable in range(1, num_variables + 1):
+            true[variable << 1] = value() < 0.5
+            true[(variable << 1) | 1] = not true[variable << 1]
+        num_clauses = len(offsets) - 1
+        true_count = [0] * num_clauses
+        critical = [0] * num_clauses
+        break_count = [0] * (num_variables + 1)
+        unsat = []
+        unsat_position = [-1] * num_clauses
+        for index in range(num_clauses):
+            count = 0
+            xor = 0
+            for literal in literals[offsets[index]:offsets[index + 1]]:
+                if true[literal]:
+                    count += 1
+                    xor ^= literal
+            true_count[index] = count
+            critical[index] = xor
+            if count == 0:
+                unsat_position[index] = len(unsat)
+                unsat.append(index)
+            elif count == 1:
+                break_count[xor >> 1] += 1
+        self.true = true
+        self.true_count = true_count
+        self.critical = critical
+        self.break_count = break_count
+        self.unsat = unsat
+        self.unsat_position = unsat_position
+        self.try_flips = 0
+        self.update_best()
+
+    def update_best(self):
+        if len(self.unsat) < self.best_unsat_count:
+            self.best_unsat_count = len(self.unsat)
+            self.best_values = self.true[0::2]
+
+    def solve(self, max_flips=None, limits=None):
+        """ Flips variables until the assignment satisfies every clause, can be called again to go on searching
+
+        :param max_flips: number of flips after which the search gives up (counted over every call), None for no limit
+        :param limits: SearchLimits, only their deadline and stop event apply
+        returns: True if a model was found (see get_variable_assignment), None if a limit was reached
+        """
+        start = time.time()
+        try:
+            return self.search(max_flips, limits)
+        finally:
+            self.search_time += time.time() - start
+
+    def search(self, max_flips, limits):
+        if self.empty_clause:
+            return None
+        if self.true is None:
+            self.restart()
+        while len(self.unsat) > 0:
+            if max_flips is not None and self.flips >= max_flips:
+                return None
+            if limits is not None and self.flips % LIMIT_CHECK_INTERVAL == 0 and limits.reached(0):
+                return None
+            if self.try_flips >= self.restart_interval:
+                self.restarts += 1
+                self.restart()
+            clause = self.unsat[int(self.random.random() * len(self.unsat))]
+            literals = self.literals[self.offsets[clause]:self.offsets[clause + 1]]
+            if self.algorithm == WALKSAT:
+                literal = self.pick_walksat(literals)
+            else:
+                literal = self.pick_probsat(literals)
+            self.flip(literal >> 1)
+            self.flips += 1
+            self.try_flips += 1
+            if len(self.unsat) < self.best_unsat_count:
+                self.update_best()
+        self.best_unsat_count = 0
+        self.best_values = self.true[0::2]
+        return True
+
+    def pick_probsat(self, literals):
+        """ returns: a literal of the clause, with probability proportional to cb ^ -(break count of its variable) """
+        break_count = self.break_count
+        probabilities = self.probabilities
+        weights = [probabilities[break_count[x >> 1]] for x in literals]
+        threshold = self.random.random() * sum(weights)
+        for literal, weight in zip(literals, weights):
+            threshold -= weight
+            if threshold < 0:
+                return literal
+        return literals[-1]
+
+    def pick_walksat(self, literals):
+        """ returns: a literal of the clause that breaks no clause, a random one with probability WALKSAT_NOISE,
+        otherwise one with the lowest break count """
+        break_count = self.break_count
+        breaks = [break_count[x >> 1] for x in literals]
+        lowest = min(breaks)
+        if lowest > 0 and self.random.random() < WALKSAT_NOISE:
+            return self.random.choice(literals)
+        return self.random.choice([x for x, y in zip(literals, breaks) if y == lowest])
+
+    def flip(self, variable):
+        true = self.true
+        true_count = self.true_count
+        critical = self.critical
+        break_count = self.break_count
+        unsat = self.unsat
+        unsat_position = self.unsat_position
+        occurrences = self.occurrences
+        occurrence_offsets = self.occurrence_offsets
+        made = variable << 1
+        if true[made]:
+            made |= 1
+        broken = made ^ 1
+        true[made] = True
+        true[broken] = False
+
+        for clause in occurrences[occurrence_offsets[made]:occurrence_offsets[made + 1]]:
+            count = true_count[clause] + 1
+            true_count[clause] = count
+            if count == 1:
+                # No longer falsified, swapped with the last falsified clause and removed
+                last = unsat.pop()
+                if last != clause:
+                    position = unsat_position[clause]
+                    unsat[position] = last
+                    unsat_position[last] = position
+                unsat_position[clause] = -1
+                break_count[variable] += 1
+            elif count == 2:
+                break_count[critical[clause] >> 1] -= 1
+            critical[clause] ^= made
+
+        for clause in occurrences[occurrence_offsets[broken]:occurrence_offsets[broken + 1]]:
+            count = true_count[clause] - 1
+            true_count[clause] = count
+            critical[clause] ^= broken
+            if count == 0:
+                unsat_position[clause] = len(unsat)
+                unsat.append(clause)
+                break_count[variable] -= 1
+            elif count == 1:
+                break_count[critical[clause] >> 1] += 1
+
+    def get_variable_assignment(self):
+        """ returns: the best assignment, as AssignmentList.get_variable_assignment { variable string -> True / False } """
+        return dict(map(lambda x: (str(x), self.best_values[x]), range(1, self.num_variables + 1)))
+
+    def set_phases(self, assignment_list):
+        """ Makes the best assignment the saved phases of the AssignmentList, the first values cdcl() decides """
+        if self.best_values is None:
+            return
+        saved_phases = assignment_list.saved_phases
+        for variable in assignment_list.variables:
+            if variable <= self.num_variables:
+                saved_phases[variable] = self.best_values[variable]
+
+    def flip_rate(self):
+        """ returns: the flips per second of solve() """
+        return self.flips / self.search_time if self.search_time > 0 else 0
+
+    def summary(self):
+        return (self.algorithm + ", " + str(self.flips) + " flips (" + str(round(self.flip_rate())) + " flips/sec), "
+            + str(self.restarts) + " restarts, best assignment falsifies " + str(self.best_unsat_count) + " clauses")
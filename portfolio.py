@@ -0,0 +1,137 @@
+""" Portfolio solving: several differently configured solvers race on the same instance in separate processes
+
+With clause sharing, the workers exchange their short learnt clauses through shared memory (see clause_sharing.py).
+The first worker to answer SAT or UNSAT wins. The others are asked to stop through a shared Event (checked after
+every conflict, see SearchLimits) and are only terminated if they do not stop within STOP_GRACE_PERIOD.
+"""
+from cdcl import *
+from clause_sharing import ClauseExchange, create_shared_memory
+import multiprocessing
+import queue
+import time
+
+STOP_GRACE_PERIOD = 2 # Seconds
+
+# A configuration is a dictionary of the branching heuristic, restart policy, polarity, target phase and seed
+CONFIGURATIONS = [
+    {'branching': VSIDS, 'restarts': GLUCOSE, 'polarity': POLARITY_VSIDS, 'target_phase': False},
+    {'branching': VSIDS, 'restarts': LUBY, 'polarity': POLARITY_FALSE, 'target_phase': False},
+    {'branching': VSIDS, 'restarts': GLUCOSE, 'polarity': POLARITY_RANDOM, 'target_phase': True},
+    {'branching': VSIDS, 'restarts': GEOMETRIC, 'polarity': POLARITY_TRUE, 'target_phase': False},
+    {'branching': VSIDS, 'restarts': LUBY, 'polarity': POLARITY_RANDOM, 'target_phase': True},
+    {'branching': RANDOM, 'restarts': LUBY, 'polarity': POLARITY_RANDOM, 'target_phase': False},
+]
+
+def portfolio_configurations(num_workers):
+    """ Returns num_workers configurations, cycling through CONFIGURATIONS with a different seed for every worker """
+    configurations = []
+    for seed in range(num_workers):
+        configuration = dict(CONFIGURATIONS[seed % len(CONFIGURATIONS)])
+        configuration['seed'] = seed
+        configurations.append(configuration)
+    return configurations
+
+def solve_with_configuration(index, filename, configuration, time_limit, stop, results, sharing):
+    """ Worker process: solves the instance with one configuration and puts its result on the results queue
+    :param sharing: (name of the shared memory of the clause sharing rings, number of workers), None without clause sharing
+    """
+    start = time.time()
+    result = {'worker': index, 'configuration': configuration, 'status': ERROR, 'time': None,
+        'decisions': None, 'conflicts': None, 'model': None, 'error': None}
+    clause_exchange = None
+    try:
+        if sharing is not None:
+            clause_exchange = ClauseExchange(sharing[0], index, sharing[1])
+        assignment_list, clauses = parse_cnf(filename)
+        assignment_list.branching_heuristic = configuration['branching']
+        assignment_list.polarity = configuration['polarity']
+        assignment_list.target_phase = configuration['target_phase']
+        assignment_list.randomize(configuration['seed'])
+        clause_database = ClauseDatabase(record_proof=False)
+        restart_policy = make_restart_policy(configuration['restarts'])
+        limits = SearchLimits(time_limit=time_limit, stop=stop)
+        satisfiable, assignment_list, _ = cdcl(assignment_list, clauses.copy(), clause_database=clause_database,
+            restart_policy=restart_policy, limits=limits, clause_exchange=clause_exchange)
+        result['status'] = status_of(satisfiable)
+        if satisfiable:
+            result['model'] = assignment_list.get_variable_assignment()
+            if not verify(result['model'], clauses):
+                result['status'] = ERROR
+                result['error'] = "model does not satisfy the formula"
+        result['decisions'] = assignment_list.branching_count
+        result['conflicts'] = clause_database.conflicts
+    except Exception as exception:
+        result['error'] = repr(exception)
+    if clause_exchange is not None:
+        result.update(clause_exchange.counts())
+        clause_exchange.close()
+    result['time'] = time.time() - start
+    results.put(result)
+
+def run_portfolio(filename, num_workers=None, configurations=None, time_limit=None, share_clauses=False):
+    """ Solves a DIMACS file with a portfolio of worker processes, the first SAT or UNSAT answer wins
+
+    :param num_workers: number of workers, defaults to the number of cores (ignored if configurations are given)
+    :param configurations: list of configurations (see CONFIGURATIONS, with a 'seed'), one worker each
+    :param time_limit: wall-clock seconds after which every worker gives up
+    :param share_clauses: whether the workers exchange their short learnt clauses (imported at restarts)
+    returns: (winning result, list of the results of every worker)
+        Every result is a dictionary with the worker index, its configuration, status (SAT / UNSAT / UNKNOWN / ERROR),
+        time, decisions, conflicts and model (for SAT). The winning result is None if no worker answered.
+        Workers that had to be terminated have an UNKNOWN status and an error message.
+        With clause sharing, the results also have the number of clauses the worker exported and imported,
+        and the number of times clauses were overwritten before it could import them (dropped).
+    """
+    if configurations is None:
+        configurations = portfolio_configurations(num_workers or os.cpu_count())
+    shared = None
+    sharing = None
+    if share_clauses:
+        shared = create_shared_memory(len(configurations))
+        sharing = (shared.name, len(configurations))
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = []
+    for index, configuration in enumerate(configurations):
+        process = multiprocessing.Process(target=solve_with_configuration,
+            args=(index, filename, configuration, time_limit, stop, results, sharing), daemon=True)
+        process.start()
+        processes.append(process)
+
+    winner = None
+    worker_results = [None] * len(processes)
+    received = 0
+    deadline = None # Set when the workers are told to stop
+    while received < len(processes):
+        try:
+            result = results.get(timeout=0.1)
+        except queue.Empty:
+            if deadline is not None and time.time() > deadline:
+                break
+            # Workers that died without a result (e.g. killed by the OS)
+            if all(map(lambda x: not x.is_alive(), processes)) and results.empty():
+                break
+            continue
+        worker_results[result['worker']] = result
+        received += 1
+        logging.info("Portfolio worker " + str(result['worker']) + " " + str(result['configuration']) + ": "
+            + result['status'] + " in " + str(round(result['time'], 3)) + "s")
+        if winner is None and result['status'] in (SAT, UNSAT):
+            winner = result
+            stop.set()
+            deadline = time.time() + STOP_GRACE_PERIOD
+
+    for index, process in enumerate(processes):
+        process.join(0 if deadline is None else max(0, deadline - time.time()))
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        if worker_results[index] is None:
+            worker_results[index] = {'worker': index, 'configuration': configurations[index], 'status': UNKNOWN,
+                'time': None, 'decisions': None, 'conflicts': None, 'model': None,
+                'error': "terminated" if deadline is not None else "exited with code " + str(process.exitcode)}
+    results.close()
+    if shared is not None:
+        shared.close()
+        shared.unlink()
+    return (winner, worker_results)
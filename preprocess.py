@@ -0,0 +1,426 @@
+""" Preprocessing of the clauses between parsing and solving
+
+The Preprocessor keeps occurrence lists (the clauses containing each literal) and simplifies the formula with:
+    - unit propagation: satisfied clauses are removed and falsified literals are left out
+    - subsumption: a clause that contains every literal of another clause is removed
+    - self-subsuming resolution: when a clause C and a clause D containing C with one literal negated are resolved,
+      the resolvent subsumes D, so that literal is removed from D (strengthening)
+    - equivalent literal substitution: the strongly connected components of the binary implication graph (the edges
+      not a -> b and not b -> a of every binary clause (a or b)) are equivalent literals, each is replaced by a single
+      representative. A component that contains both a literal and its negation makes the clauses UNSAT.
+    - bounded variable elimination: a variable is eliminated by replacing the clauses it appears in by all their
+      non-tautological resolvents on it, as long as that does not grow the number of clauses by more than a limit
+Every clause that is changed is replaced by a new Clause, with its resolution steps when the proof is recorded, so a
+contradiction proof can still go back to the original clauses.
+With a DRAT proof, every new clause is written as a lemma when it is added (each one follows from the clauses present
+at that point by unit propagation), and the removed clauses are only written as deleted at the end of run(), since
+the clauses derived from them may be added after they are removed.
+The eliminated and substituted variables are left out of the formula given to the solver, reconstruct() gives them
+back their values.
+"""
+from structures import *
+from collections import deque
+
+ELIMINATION_OCCURRENCE_LIMIT = 16 # Variables that appear in more clauses are not eliminated
+ELIMINATION_CLAUSE_GROWTH = 0 # An elimination may add this many more resolvents than the clauses it removes
+RESOLVENT_SIZE_LIMIT = 20 # An elimination is given up if one of its resolvents has more literals
+SUBSUMPTION_OCCURRENCE_LIMIT = 1000 # Clauses are not checked for subsumption against longer occurrence lists
+ELIMINATION_ROUNDS = 3 # Maximum number of passes over the variables
+
+def strongly_connected_components(nodes, successors):
+    """ Iterative Tarjan's algorithm (the implication graphs are deeper than the recursion limit)
+
+    :param nodes: iterable of the nodes (ints) to start the depth-first searches from
+    :param successors: function that returns the list of the successors of a node
+    returns: list of the components (lists of nodes), in reverse topological order
+    """
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    for root in nodes:
+        if root in index_of:
+            continue
+        index_of[root] = lowlink[root] = len(index_of)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+        while len(work) > 0:
+            node, children = work[-1]
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = len(index_of)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            else:
+                work.pop()
+                if len(work) > 0:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+class Preprocessor:
+    """ Simplifies a list of clauses before the search
+
+    :attribute clauses: Dictionary of the clauses of the simplified formula (as keys, in the order they were added)
+    :attribute occurrences: List containing the dictionary of the clauses containing each literal, indexed by the literal
+    :attribute signatures: Dictionary of the signature of each clause, a bitmask of its variables used to rule out
+        most of the subsumption checks
+    :attribute variables: List of the variables of the original clauses
+    :attribute fixed: Dictionary of the variables fixed by unit clauses - { variable -> (literal, unit Clause) }
+    :attribute eliminated: Set of the eliminated variables
+    :attribute elimination_stack: List of (literal, literals of a removed clause) used to reconstruct the model,
+        the clauses of every eliminated variable in the order of elimination
+    :attribute substituted: Dictionary of the substituted variables - { variable -> literal of the representative it
+        is equivalent to }
+    :attribute contradiction: the empty Clause if the clauses were found UNSAT, None otherwise
+    :attribute record_proof: Whether the changed clauses keep their resolution steps
+    :attribute proof: DratWriter (see drat.py) the new clauses are written to, None if no proof is written
+    :attribute removed_clauses: List of the clauses removed, written to the proof as deleted at the end of run()
+    """
+
+    def __init__(self, clauses, record_proof=False, proof=None):
+        variables = set()
+        for clause in clauses:
+            variables.update(map(lambda x: x >> 1, clause.literals))
+        self.variables = sorted(variables)
+        num_variables = max(variables, default=0)
+        self.occurrences = [{} for _ in range(2 * num_variables + 2)]
+        self.clauses = {}
+        self.signatures = {}
+        self.fixed = {}
+        self.eliminated = set()
+        self.substituted = {}
+        self.elimination_stack = []
+        self.contradiction = None
+        self.record_proof = record_proof
+        self.units = []
+        self.subsumption_queue = []
+        self.subsumed_count = 0
+        self.strengthened_count = 0
+        self.proof = None
+        self.removed_clauses = []
+        for clause in clauses:
+            self.add(clause)
+        self.proof = proof
+
+    ############################
+    # Methods for the clauses #
+    ############################
+
+    def add(self, clause):
+        """ Adds a clause, unit clauses are queued for propagation """
+        literals = clause.literals
+        if self.proof is not None:
+            self.proof.add(literals)
+        if len(literals) == 0:
+            if self.contradiction is None:
+                self.contradiction = clause
+            return
+        if any(map(lambda x: x ^ 1 in literals, literals)): # Tautology
+            return
+        if len(literals) == 1:
+            self.units.append(clause)
+            return
+        occurrences = self.occurrences
+        signature = 0
+        for literal in literals:
+            occurrences[literal][clause] = None
+            signature |= 1 << ((literal >> 1) & 63)
+        self.clauses[clause] = None
+        self.signatures[clause] = signature
+        self.subsumption_queue.append(clause)
+
+    def remove(self, clause):
+        if self.proof is not None:
+            self.removed_clauses.append(clause)
+        occurrences = self.occurrences
+        for literal in clause.literals:
+            occurrences[literal].pop(clause, None)
+        del self.clauses[clause]
+        del self.signatures[clause]
+
+    def resolve(self, clause, other, variable):
+        """ Returns the resolvent of two clauses on a variable, as a new Clause (with its resolution steps) """
+        literals = dict.fromkeys(filter(lambda x: x >> 1 != variable, clause.literals))
+        literals.update(dict.fromkeys(filter(lambda x: x >> 1 != variable, other.literals)))
+        resolvent = Clause(list(literals))
+        if self.record_proof:
+            resolvent.resolution_steps = [(clause, None), (other, variable)]
+        return resolvent
+
+    def get_clauses(self):
+        """ returns: list of the clauses of the simplified formula """
+        return list(self.clauses)
+
+    ####################
+    # Simplifications #
+    ####################
+
+    def run(self):
+        """ Simplifies the clauses until nothing changes (or ELIMINATION_ROUNDS passes of variable elimination)
+        returns: False if the clauses were found UNSAT (see contradiction), True otherwise
+        """
+        try:
+            return self.run_rounds()
+        finally:
+            if self.proof is not None:
+                for clause in self.removed_clauses:
+                    self.proof.delete(clause.literals)
+                self.removed_clauses = []
+
+    def run_rounds(self):
+        if not self.simplify():
+            return False
+        for _ in range(ELIMINATION_ROUNDS):
+            if not self.substitute_equivalences() or not self.simplify():
+                return False
+            occurrences = self.occurrences
+            candidates = filter(lambda x: x not in self.fixed and x not in self.eliminated
+                and x not in self.substituted, self.variables)
+            candidates = sorted(candidates, key=lambda x: len(occurrences[x << 1]) + len(occurrences[(x << 1) | 1]))
+            eliminated_count = len(self.eliminated)
+            for variable in candidates:
+                if variable not in self.fixed and self.eliminate(variable) and not self.simplify():
+                    return False
+            if len(self.eliminated) == eliminated_count:
+                break
+        return True
+
+    def simplify(self):
+        """ Propagates the unit clauses, then removes the subsumed clauses and strengthens the clauses of the queue
+        returns: False if the clauses were found UNSAT
+        """
+        while self.contradiction is None and (len(self.units) > 0 or len(self.subsumption_queue) > 0):
+            # The shortest clauses subsume the most, the clauses added meanwhile wait for the next batch
+            queue = sorted(self.subsumption_queue, key=lambda x: len(x.literals))
+            self.subsumption_queue = []
+            for clause in queue:
+                while len(self.units) > 0 and self.contradiction is None:
+                    self.propagate(self.units.pop())
+                if self.contradiction is not None:
+                    break
+                if clause in self.clauses:
+                    self.subsume(clause)
+            while len(self.units) > 0 and self.contradiction is None:
+                self.propagate(self.units.pop())
+        return self.contradiction is None
+
+    def propagate(self, unit_clause):
+        """ Fixes the literal of a unit clause: the clauses it satisfies are removed, its negation is left out of the others """
+        literal = unit_clause.literals[0]
+        variable = literal >> 1
+        if variable in self.fixed:
+            fixed_literal, reason = self.fixed[variable]
+            if fixed_literal != literal:
+                self.add(self.resolve(unit_clause, reason, variable))
+            return
+        self.fixed[variable] = (literal, unit_clause)
+        for clause in list(self.occurrences[literal]):
+            self.remove(clause)
+        for clause in list(self.occurrences[literal ^ 1]):
+            self.remove(clause)
+            self.add(self.resolve(clause, unit_clause, variable))
+
+    def subsume(self, clause):
+        """ Removes the clauses subsumed by a clause, and strengthens the clauses it self-subsumes """
+        occurrences = self.occurrences
+        # Every candidate contains the variable of each literal of the clause, so one variable is enough
+        variable = min(map(lambda x: x >> 1, clause.literals),
+            key=lambda x: len(occurrences[x << 1]) + len(occurrences[(x << 1) | 1]))
+        candidates = list(occurrences[variable << 1]) + list(occurrences[(variable << 1) | 1])
+        if len(candidates) > SUBSUMPTION_OCCURRENCE_LIMIT:
+            return
+        signature = self.signatures[clause]
+        literals = clause.literals
+        for other in candidates:
+            if other is clause or other not in self.clauses or signature & ~self.signatures[other] != 0 \
+                or len(other.literals) < len(literals):
+                continue
+            other_literals = set(other.literals)
+            negated_literal = None
+            for literal in literals:
+                if literal in other_literals:
+                    continue
+                if negated_literal is None and literal ^ 1 in other_literals:
+                    negated_literal = literal ^ 1
+                    continue
+                break
+            else:
+                self.remove(other)
+                if negated_literal is None:
+                    self.subsumed_count += 1
+                else:
+                    self.strengthened_count += 1
+                    self.add(self.resolve(other, clause, negated_literal >> 1))
+
+    def eliminate(self, variable):
+        """ Eliminates a variable by resolution if there are at most ELIMINATION_CLAUSE_GROWTH more resolvents
+        than clauses containing it
+        returns: whether the variable was eliminated
+        """
+        positive = list(self.occurrences[variable << 1])
+        negative = list(self.occurrences[(variable << 1) | 1])
+        if len(positive) + len(negative) > ELIMINATION_OCCURRENCE_LIMIT and len(positive) > 0 and len(negative) > 0:
+            return False
+        limit = len(positive) + len(negative) + ELIMINATION_CLAUSE_GROWTH
+        resolvents = []
+        for positive_clause in positive:
+            for negative_clause in negative:
+                literals = set(positive_clause.literals)
+                literals.discard(variable << 1)
+                if any(map(lambda x: x ^ 1 in literals, filter(lambda x: x >> 1 != variable, negative_clause.literals))):
+                    continue
+                literals.update(negative_clause.literals)
+                if len(literals) - 1 > RESOLVENT_SIZE_LIMIT:
+                    return False
+                resolvents.append((positive_clause, negative_clause))
+                if len(resolvents) > limit:
+                    return False
+        for clause in positive:
+            self.elimination_stack.append((variable << 1, list(clause.literals)))
+            self.remove(clause)
+        for clause in negative:
+            self.elimination_stack.append(((variable << 1) | 1, list(clause.literals)))
+            self.remove(clause)
+        self.eliminated.add(variable)
+        for positive_clause, negative_clause in resolvents:
+            self.add(self.resolve(positive_clause, negative_clause, variable))
+        return True
+
+    def substitute_equivalences(self):
+        """ Replaces every set of equivalent literals (a strongly connected component of the binary implication graph)
+        by its literal with the lowest variable
+        returns: False if a component contains a literal and its negation (the clauses are UNSAT)
+        """
+        occurrences = self.occurrences
+        implications = {} # { literal -> { implied literal -> binary Clause } }
+        for clause in self.clauses:
+            if len(clause.literals) == 2:
+                first, second = clause.literals
+                implications.setdefault(first ^ 1, {})[second] = clause
+                implications.setdefault(second ^ 1, {})[first] = clause
+        if len(implications) == 0:
+            return True
+        empty = {}
+        successors = lambda x: list(implications.get(x, empty))
+        representatives = {}
+        for component in strongly_connected_components(list(implications), successors):
+            if len(component) == 1:
+                continue
+            members = set(component)
+            for literal in component:
+                if literal ^ 1 in members:
+                    # literal implies its negation and the other way around
+                    if self.proof is not None:
+                        self.proof.add([literal ^ 1])
+                        self.proof.add([])
+                    self.contradiction = Clause([])
+                    if self.record_proof:
+                        self.contradiction.resolution_steps = [
+                            (self.implications_to(literal, members, implications)[literal ^ 1], None),
+                            (self.implications_to(literal ^ 1, members, implications)[literal], literal >> 1)]
+                    return False
+            representative = min(component, key=lambda x: x >> 1)
+            if representative & 1 == 0: # Once per pair of components, the other one holds the negations
+                for literal in component:
+                    if literal != representative:
+                        representatives[literal] = representative
+                        representatives[literal ^ 1] = representative ^ 1
+        if len(representatives) == 0:
+            return True
+
+        # Clauses containing substituted literals are resolved with the implications of their representatives
+        substituted_clauses = {}
+        for literal in representatives:
+            substituted_clauses.update(dict.fromkeys(occurrences[literal]))
+        derived = {}
+        if self.record_proof:
+            components = {}
+            for literal, representative in representatives.items():
+                components.setdefault(representative, {representative}).add(literal)
+            for representative, members in components.items():
+                derived.update(self.implications_to(representative, members, implications))
+        for clause in substituted_clauses:
+            self.remove(clause)
+            literals = list(dict.fromkeys(map(lambda x: representatives.get(x, x), clause.literals)))
+            if any(map(lambda x: x ^ 1 in literals, literals)):
+                continue
+            substituted = Clause(literals)
+            if self.record_proof:
+                substituted.resolution_steps = [(clause, None)]
+                for literal in filter(lambda x: x in representatives, clause.literals):
+                    substituted.resolution_steps.append((derived[literal], literal >> 1))
+            self.add(substituted)
+        for literal, representative in representatives.items():
+            if literal & 1 == 0:
+                # literal = representative, as the clauses (literal or not representative), (not literal or representative)
+                self.substituted[literal >> 1] = representative
+                self.elimination_stack.append((literal, [literal, representative ^ 1]))
+                self.elimination_stack.append((literal ^ 1, [literal ^ 1, representative]))
+        return True
+
+    def implications_to(self, root, members, implications):
+        """ Derives the binary clauses (not literal or root) of the members of a component that imply the root, along a
+        breadth-first tree of the implication graph towards the root (with their resolution steps)
+        returns: { literal -> Clause }, the root maps to None
+        """
+        derived = {root: None}
+        queue = deque([root])
+        while len(queue) > 0:
+            literal = queue.popleft()
+            # The binary clause (other or literal) is the edge not other -> literal
+            for other, edge in implications.get(literal ^ 1, {}).items():
+                predecessor = other ^ 1
+                if predecessor not in members or predecessor in derived:
+                    continue
+                if derived[literal] is None:
+                    derived[predecessor] = edge
+                else:
+                    clause = Clause(list(dict.fromkeys([other, root])))
+                    clause.resolution_steps = [(edge, None), (derived[literal], literal >> 1)]
+                    derived[predecessor] = clause
+                queue.append(predecessor)
+        return derived
+
+    #########################
+    # Model reconstruction #
+    #########################
+
+    def reconstruct(self, variable_assignment):
+        """ Extends a model of the simplified formula to a model of the original clauses
+        The fixed variables get their values, the eliminated and substituted variables are set (in reverse order) so that
+        every clause they were removed with is satisfied, and the variables that disappeared otherwise are False.
+
+        :param variable_assignment: { variable string -> True / False } of the simplified formula
+        returns: { variable string -> True / False } of every variable of the original clauses
+        """
+        model = dict(variable_assignment)
+        for variable, (literal, _) in self.fixed.items():
+            model[str(variable)] = literal & 1 == 0
+        for variable in self.variables:
+            model.setdefault(str(variable), False)
+        for literal, literals in reversed(self.elimination_stack):
+            if not any(map(lambda x: model[str(x >> 1)] != (x & 1 == 1), literals)):
+                model[str(literal >> 1)] = literal & 1 == 0
+        return model
+
+    def summary(self):
+        return (str(len(self.fixed)) + " fixed, " + str(len(self.substituted)) + " substituted, "
+            + str(len(self.eliminated)) + " eliminated variables, "
+            + str(self.subsumed_count) + " subsumed, " + str(self.strengthened_count) + " strengthened clauses, "
+            + str(len(self.clauses)) + " clauses left")
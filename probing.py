@@ -0,0 +1,191 @@
+""" Failed literal probing with hyper-binary resolution, at the root level
+
+Both values of every variable are decided in turn (probed) and propagated:
+    - a value that conflicts is a failed literal, the unit clause learnt from the conflict is added at the root level
+    - a literal implied by both values of the variable is added as a unit clause
+    - a literal implied through a clause with at least two literals False at the probe's level is implied by the probe
+      through more than binary clauses, so the hyper-binary resolvent (not probe or literal) is learnt: later
+      propagations reach it through a single binary clause
+A round stops after PROBE_PROPAGATION_BUDGET propagated literals, and the next round goes on with the next variable.
+"""
+from cdcl import *
+
+PROBE_PROPAGATION_BUDGET = 20000 # Literals propagated by the probes of one round
+PROBE_RESTART_INTERVAL = 20 # Restarts between two rounds when probing between restarts
+
+class Prober:
+    """ Probes the variables of a formula, before the search and optionally between restarts
+
+    :attribute budget: Number of literals the probes of one round may propagate
+    :attribute restart_interval: Number of restarts between two rounds, None to only probe before the search
+    :attribute position: Index (in AssignmentList.variables) of the next variable to probe
+    :attribute restarts: Int counter of the restarts seen
+    :attribute rounds: Int counter of the probing rounds
+    :attribute probed_count: Int counter of the variables probed
+    :attribute failed_count: Int counter of the failed literals
+    :attribute implied_count: Int counter of the literals implied by both values of a variable
+    :attribute hyper_binary_count: Int counter of the hyper-binary resolvents learnt
+    :attribute propagations: Int counter of the literals propagated by the probes
+    """
+
+    def __init__(self, budget=PROBE_PROPAGATION_BUDGET, restart_interval=None):
+        self.budget = budget
+        self.restart_interval = restart_interval
+        self.position = 0
+        self.restarts = 0
+        self.rounds = 0
+        self.probed_count = 0
+        self.failed_count = 0
+        self.implied_count = 0
+        self.hyper_binary_count = 0
+        self.propagations = 0
+
+    def did_restart(self):
+        """ Called after every restart, returns whether a round of probing is due """
+        self.restarts += 1
+        return self.restart_interval is not None and self.restarts % self.restart_interval == 0
+
+    def probe(self, assignment_list, propagator, clause_database):
+        """ Runs a round of probing at the root level, within the propagation budget
+
+        returns: None, or the empty Clause if the formula was found UNSAT
+        """
+        self.rounds += 1
+        conflict = propagator.propagate(assignment_list)
+        if conflict is not None:
+            return analyze_conflict(assignment_list, conflict, clause_database)[0]
+        # Probes must not overwrite the phases of the search
+        saved_phases = assignment_list.saved_phases.copy()
+        target_phase = assignment_list.target_phase
+        assignment_list.target_phase = False
+        try:
+            return self.probe_variables(assignment_list, propagator, clause_database)
+        finally:
+            assignment_list.saved_phases = saved_phases
+            assignment_list.target_phase = target_phase
+
+    def probe_variables(self, assignment_list, propagator, clause_database):
+        variables = assignment_list.variables
+        values = assignment_list.values
+        trail = assignment_list.trail
+        spent = 0
+        for _ in range(len(variables)):
+            if spent >= self.budget:
+                break
+            variable = variables[self.position % len(variables)]
+            self.position += 1
+            if values[variable << 1] is not None:
+                continue
+            self.probed_count += 1
+            implied = []
+            for literal in (variable << 1, (variable << 1) | 1):
+                size = len(trail)
+                assignment_list.decide(literal)
+                conflict = propagator.propagate(assignment_list)
+                spent += len(trail) - size
+                if conflict is not None:
+                    # Only the probe is decided, so the learnt clause is a unit clause
+                    learnt_clause, _ = analyze_conflict(assignment_list, conflict, clause_database)
+                    assignment_list.backtrack(0)
+                    self.failed_count += 1
+                    if not self.add_units([learnt_clause], assignment_list):
+                        return analyze_conflict(assignment_list, learnt_clause, clause_database)[0]
+                    break
+                derivations, hyper_binary_clauses = self.implications(literal, size, assignment_list,
+                    clause_database.record_proof)
+                assignment_list.backtrack(0)
+                for clause in hyper_binary_clauses:
+                    if clause_database.proof is not None:
+                        clause_database.proof.add(clause.literals)
+                    clause_database.add_learnt(clause, assignment_list)
+                    clause.lbd = 2
+                    propagator.watch(clause)
+                self.hyper_binary_count += len(hyper_binary_clauses)
+                implied.append(derivations)
+            else:
+                unit_clauses = []
+                for literal in implied[0].keys() & implied[1].keys():
+                    unit_clause = Clause([literal])
+                    unit_clause.learnt = True
+                    if clause_database.record_proof:
+                        unit_clause.resolution_steps = [(implied[0][literal], None), (implied[1][literal], variable)]
+                    unit_clauses.append(unit_clause)
+                self.implied_count += len(unit_clauses)
+                if clause_database.proof is not None:
+                    self.write_implied_units(unit_clauses, variable, clause_database.proof)
+                if not self.add_units(unit_clauses, assignment_list):
+                    return analyze_conflict(assignment_list, unit_clauses[-1], clause_database)[0]
+            # The units found are propagated before the next probe
+            size = len(trail)
+            conflict = propagator.propagate(assignment_list)
+            spent += len(trail) - size
+            if conflict is not None:
+                return analyze_conflict(assignment_list, conflict, clause_database)[0]
+        self.propagations += spent
+        return None
+
+    def add_units(self, unit_clauses, assignment_list):
+        """ Assigns unit clauses at the root level
+        returns: False if one of them is already False (it is then the last one)
+        """
+        for index, unit_clause in enumerate(unit_clauses):
+            value = assignment_list.value_of(unit_clause.literals[0])
+            if value is False:
+                del unit_clauses[index + 1:]
+                return False
+            if value is None:
+                unit_clause.lbd = 1
+                assignment_list.assign_literal(unit_clause.literals[0], unit_clause)
+        return True
+
+    def write_implied_units(self, unit_clauses, variable, proof):
+        """ Writes the literals implied by both values of a variable to a DRAT proof
+        A unit clause (literal) does not follow from unit propagation on its own, the binary clauses
+        (not variable or literal) and (variable or literal) do, and the unit clause follows from them.
+        """
+        for unit_clause in unit_clauses:
+            literal = unit_clause.literals[0]
+            binary_clauses = [[(variable << 1) | 1, literal], [variable << 1, literal]]
+            for literals in binary_clauses:
+                proof.add(literals)
+            proof.add([literal])
+            for literals in binary_clauses:
+                proof.delete(literals)
+
+    def implications(self, probe, start, assignment_list, record_proof):
+        """ Goes through the literals implied by the probe (decided at level 1, from trail index start)
+
+        returns: ({ implied literal -> binary Clause (not probe or literal) }, list of hyper-binary resolvents)
+            The binary clauses only have their resolution steps (and are only created) when the proof is recorded.
+        """
+        levels = assignment_list.levels
+        reasons = assignment_list.reasons
+        trail = assignment_list.trail
+        derivations = {}
+        hyper_binary_clauses = []
+        for literal in trail[start + 1:]:
+            reason = reasons[literal >> 1]
+            false_literals = [x for x in reason.literals if x != literal and levels[x >> 1] > 0]
+            clause = None
+            if len(false_literals) >= 2:
+                clause = Clause([probe ^ 1, literal])
+                clause.learnt = True
+                hyper_binary_clauses.append(clause)
+            elif record_proof:
+                clause = reason
+                if len(reason.literals) > 2 or false_literals != [probe ^ 1]:
+                    clause = Clause([probe ^ 1, literal])
+                    clause.learnt = True
+            if record_proof and clause is not reason:
+                clause.resolution_steps = [(reason, None)]
+                for false_literal in false_literals:
+                    if false_literal != probe ^ 1:
+                        clause.resolution_steps.append((derivations[false_literal ^ 1], false_literal >> 1))
+                clause.root_variables = [x >> 1 for x in reason.literals if x != literal and levels[x >> 1] == 0]
+            derivations[literal] = clause
+        return derivations, hyper_binary_clauses
+
+    def summary(self):
+        return (str(self.rounds) + " rounds, " + str(self.probed_count) + " variables probed, "
+            + str(self.failed_count) + " failed literals, " + str(self.implied_count) + " implied by both values, "
+            + str(self.hyper_binary_count) + " hyper-binary resolvents")
@@ -0,0 +1,148 @@
+""" Restart policies for the CDCL solver
+
+A restart policy is told about every conflict (with the LBD of the clause learnt from it) and decides when the
+solver should backtrack to the root level. The saved phases in the AssignmentList keep the progress made before a restart.
+"""
+
+# Restart policies
+NO_RESTARTS = 'none'
+LUBY = 'luby'
+GEOMETRIC = 'geometric'
+GLUCOSE = 'glucose'
+
+def make_restart_policy(name):
+    """ Creates the restart policy with the given name (NO_RESTARTS, LUBY, GEOMETRIC or GLUCOSE) """
+    if name == NO_RESTARTS:
+        return NoRestarts()
+    if name == LUBY:
+        return LubyRestarts()
+    if name == GEOMETRIC:
+        return GeometricRestarts()
+    if name == GLUCOSE:
+        return GlucoseRestarts()
+    raise ValueError("Unknown restart policy: " + str(name))
+
+def luby(index):
+    """ Returns the index-th element (starting from 0) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 1 1 2 4 8 ... """
+    size = 1
+    while size < index + 1:
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        index = index % size
+    return (size + 1) >> 1
+
+class NoRestarts:
+    """ Never restarts """
+
+    def __init__(self):
+        self.restart_count = 0
+
+    def did_conflict(self, lbd):
+        pass
+
+    def should_restart(self):
+        return False
+
+    def did_restart(self):
+        self.restart_count += 1
+
+class LubyRestarts:
+    """ Restarts after unit * luby(i) conflicts for the i-th restart (counting from 0)
+
+    :attribute unit: Number of conflicts multiplied with the Luby sequence
+    :attribute conflicts: Number of conflicts since the last restart
+    :attribute limit: Number of conflicts at which the next restart happens
+    """
+
+    def __init__(self, unit=100):
+        self.unit = unit
+        self.restart_count = 0
+        self.conflicts = 0
+        self.limit = unit * luby(0)
+
+    def did_conflict(self, lbd):
+        self.conflicts += 1
+
+    def should_restart(self):
+        return self.conflicts >= self.limit
+
+    def did_restart(self):
+        self.restart_count += 1
+        self.conflicts = 0
+        self.limit = self.unit * luby(self.restart_count)
+
+class GeometricRestarts:
+    """ Restarts after first * factor^i conflicts for the i-th restart
+
+    :attribute conflicts: Number of conflicts since the last restart
+    :attribute limit: Number of conflicts at which the next restart happens
+    """
+
+    def __init__(self, first=100, factor=1.5):
+        self.factor = factor
+        self.restart_count = 0
+        self.conflicts = 0
+        self.limit = first
+
+    def did_conflict(self, lbd):
+        self.conflicts += 1
+
+    def should_restart(self):
+        return self.conflicts >= self.limit
+
+    def did_restart(self):
+        self.restart_count += 1
+        self.conflicts = 0
+        self.limit *= self.factor
+
+class MovingAverage:
+    """ Exponential moving average, corrected for its bias towards 0 in the beginning """
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.biased_value = 0.0
+        self.correction = 1.0
+
+    def update(self, value):
+        self.biased_value += self.alpha * (value - self.biased_value)
+        self.correction *= 1 - self.alpha
+
+    @property
+    def value(self):
+        if self.correction == 1.0:
+            return 0.0
+        return self.biased_value / (1 - self.correction)
+
+class GlucoseRestarts:
+    """ Dynamic restarts as in Glucose: restarts when the recent learnt clauses are worse (higher LBD)
+    than the learnt clauses overall, i.e. when fast_average * margin > slow_average
+
+    :attribute fast_average: MovingAverage of the LBD of the last few learnt clauses
+    :attribute slow_average: MovingAverage of the LBD of all the learnt clauses
+    :attribute margin: Glucose's K constant
+    :attribute minimum_conflicts: Number of conflicts to wait for after a restart
+    :attribute conflicts: Number of conflicts since the last restart
+    """
+
+    def __init__(self, fast_alpha=1/32, slow_alpha=1/4096, margin=0.8, minimum_conflicts=50):
+        self.fast_average = MovingAverage(fast_alpha)
+        self.slow_average = MovingAverage(slow_alpha)
+        self.margin = margin
+        self.minimum_conflicts = minimum_conflicts
+        self.restart_count = 0
+        self.conflicts = 0
+
+    def did_conflict(self, lbd):
+        self.conflicts += 1
+        self.fast_average.update(lbd)
+        self.slow_average.update(lbd)
+
+    def should_restart(self):
+        if self.conflicts < self.minimum_conflicts:
+            return False
+        return self.fast_average.value * self.margin > self.slow_average.value
+
+    def did_restart(self):
+        self.restart_count += 1
+        self.conflicts = 0
@@ -0,0 +1,228 @@
+""" Incremental solving: a Solver object keeps its state between calls to solve()
+
+Clauses can be added between the calls, and every call can solve under assumptions (literals that must be True for
+that call only). The learnt clauses, VSIDS scores and saved phases are kept, so related queries on the same formula
+get cheaper instead of starting from scratch. Literals are given as DIMACS integers (e.g. -3 for not 3).
+
+    solver = load_solver("einstein/einstein.cnf")
+    solver.solve()
+    solver.add_clause([-12, 40])
+    solver.solve(assumptions=[7, -8]) # False if 7 and not 8 cannot both hold, solver.failed_assumptions tells why
+    for model in solver.models(projection=range(1, 26)):
+        ...
+
+Models are enumerated with blocking clauses that all contain the negation of a fresh selector variable, which is
+assumed True during the enumeration. Afterwards the selector is made False at the root level, which satisfies the
+blocking clauses (and every clause learnt from them) for good, so they can be deleted and the solver reused.
+"""
+from cdcl import *
+
+def to_dimacs(literal):
+    """ Converts an integer encoded literal to its DIMACS integer """
+    if literal & 1:
+        return -(literal >> 1)
+    return literal >> 1
+
+class Solver:
+    """ CDCL solver that can be called many times on a growing formula
+
+    :attribute assignment_list: AssignmentList kept between the calls (VSIDS scores, saved phases)
+    :attribute propagator: WatchedLiterals (or ClauseScan, BitsetPropagator) watching every clause added so far
+    :attribute clause_database: ClauseDatabase of the learnt clauses, kept between the calls
+    :attribute restart_policy: restart policy from restarts.py
+    :attribute clauses: List of every Clause added, as given (used to verify the models)
+    :attribute ok: False once the clauses are UNSAT without any assumptions, every later call is then UNSAT
+    :attribute model: variable assignment (as returned by AssignmentList.get_variable_assignment) after a SAT answer
+    :attribute failed_assumptions: after an UNSAT answer, the DIMACS literals of a subset of the assumptions that
+        cannot hold together (empty if the clauses are UNSAT by themselves)
+    :attribute selector_variables: Set of the variables created for the model enumerations, left out of the models
+    :attribute statistics: SearchStatistics of every call so far
+    """
+
+    def __init__(self, clauses=(), propagation=WATCHED_LITERALS, restarts=GLUCOSE):
+        """ :param clauses: initial list of Clause (as returned by parse_cnf), their occurrences are the initial VSIDS scores """
+        clauses = list(clauses)
+        self.assignment_list = AssignmentList(clauses)
+        self.propagator = make_propagator(propagation, self.assignment_list.num_variables)
+        self.clause_database = ClauseDatabase(record_proof=False)
+        self.restart_policy = make_restart_policy(restarts)
+        self.clauses = []
+        self.ok = True
+        self.model = None
+        self.failed_assumptions = None
+        self.selector_variables = set()
+        self.statistics = SearchStatistics()
+        for clause in clauses:
+            self.add_encoded_clause(clause.literals)
+
+    def add_clause(self, literals):
+        """ Adds a clause of DIMACS literals, for every later call
+        returns: False if the clauses are now UNSAT without any assumptions, True otherwise
+        """
+        return self.add_encoded_clause(list(map(to_literal, literals)))
+
+    def add_encoded_clause(self, literals):
+        """ Adds a clause of integer encoded literals (see add_clause) """
+        self.clauses.append(Clause(list(literals)))
+        if not self.ok:
+            return False
+        literals = set(literals)
+        if any(map(lambda x: x ^ 1 in literals, literals)): # Tautology
+            return True
+        self.assignment_list.backtrack(0)
+        self.add_variables(map(lambda x: x >> 1, literals))
+        if add_clause_at_root(self.assignment_list, self.propagator, literals) is False:
+            self.ok = False
+        return self.ok
+
+    def add_variables(self, variables):
+        self.assignment_list.add_variables(variables)
+        self.propagator.grow(self.assignment_list.num_variables)
+
+    def solve(self, assumptions=(), limits=None):
+        """ Solves the clauses added so far, under the assumptions
+
+        :param assumptions: DIMACS literals that must be True, for this call only
+        :param limits: SearchLimits of this call
+        returns: True (SAT, see model), False (UNSAT, see failed_assumptions) or None if a limit was reached
+        """
+        self.model = None
+        self.failed_assumptions = None
+        if not self.ok:
+            self.failed_assumptions = []
+            return False
+        assumptions = list(map(to_literal, assumptions))
+        self.assignment_list.backtrack(0)
+        self.add_variables(map(lambda x: x >> 1, assumptions))
+        result, _, failed_assumptions = search(self.assignment_list, self.propagator, self.clause_database,
+            self.restart_policy, limits, assumptions=assumptions, statistics=self.statistics)
+        if result:
+            self.model = self.get_model()
+        elif result is not None:
+            if failed_assumptions is None:
+                self.ok = False
+                failed_assumptions = []
+            self.failed_assumptions = list(map(to_dimacs, failed_assumptions))
+        self.assignment_list.backtrack(0)
+        return result
+
+    def get_model(self, variables=None):
+        """ returns: the variable assignment of the current (full) trail, restricted to the variables if given """
+        values = self.assignment_list.values
+        if variables is None:
+            variables = filter(lambda x: x not in self.selector_variables, self.assignment_list.variables)
+        return dict(map(lambda x: (str(x), values[x << 1]), variables))
+
+    def models(self, assumptions=(), projection=None, limit=None):
+        """ Generates the models of the clauses under the assumptions, one at a time
+        After every model, a blocking clause is added and the search goes on from the level it backjumps to, so the
+        learnt clauses and the trail below that level are reused.
+
+        :param projection: DIMACS variables the models are restricted to, every model then differs on them.
+            All the variables if None, every model is then a different full assignment (the blocking clause is the
+            negation of the decisions, since they imply the rest of the model)
+        :param limit: maximum number of models
+        yields: variable assignments { variable string -> True / False }
+        """
+        if not self.ok:
+            return
+        self.assignment_list.backtrack(0)
+        selector = (self.assignment_list.num_variables + 1) << 1
+        self.selector_variables.add(selector >> 1)
+        assumptions = [selector] + list(map(to_literal, assumptions))
+        self.add_variables(map(lambda x: x >> 1, assumptions))
+        if projection is not None:
+            projection = list(dict.fromkeys(map(abs, projection)))
+            self.add_variables(projection)
+        blocking_clauses = []
+        count = 0
+        try:
+            while limit is None or count < limit:
+                result, _, failed_assumptions = search(self.assignment_list, self.propagator, self.clause_database,
+                    self.restart_policy, assumptions=assumptions, statistics=self.statistics)
+                if not result:
+                    if result is False and failed_assumptions is None:
+                        self.ok = False
+                    return
+                count += 1
+                # The blocking clause is taken from the trail before the caller gets the model, since the caller may
+                # use the solver (solve(), add_clause()) before asking for the next one
+                literals = self.blocking_literals(selector, projection)
+                trail = list(self.assignment_list.trail)
+                yield self.get_model(projection)
+                if literals is None or not self.ok:
+                    return
+                if self.assignment_list.trail == trail:
+                    blocking_clause = self.block(literals)
+                else:
+                    blocking_clause = self.block_at_root(literals)
+                    if blocking_clause is False:
+                        return
+                if blocking_clause is not None:
+                    blocking_clauses.append(blocking_clause)
+        finally:
+            # The selector is False for good, which satisfies every blocking clause
+            self.assignment_list.backtrack(0)
+            for blocking_clause in blocking_clauses:
+                blocking_clause.deleted = True
+            self.propagator.remove(blocking_clauses)
+            if self.ok and add_clause_at_root(self.assignment_list, self.propagator, [selector ^ 1]) is False:
+                self.ok = False
+
+    def blocking_literals(self, selector, projection):
+        """ returns: the literals of the clause blocking the model on the trail, by decreasing decision level,
+            None if there is no other model (the model only depends on the assumptions)
+        """
+        assignment_list = self.assignment_list
+        levels = assignment_list.levels
+        if projection is None:
+            reasons = assignment_list.reasons
+            literals = [x ^ 1 for x in assignment_list.trail if reasons[x >> 1] is None and levels[x >> 1] > 0]
+        else:
+            values = assignment_list.values
+            literals = [selector ^ 1] + [(x << 1) | values[x << 1] for x in projection]
+        literals.sort(key=lambda x: levels[x >> 1], reverse=True)
+        if len(literals) < 2 or levels[literals[1] >> 1] == 0:
+            return None
+        return literals
+
+    def block(self, literals):
+        """ Adds the blocking clause of the model still on the trail (see blocking_literals), and backjumps to the
+        level where it asserts a literal
+
+        returns: the blocking Clause
+        """
+        assignment_list = self.assignment_list
+        levels = assignment_list.levels
+        blocking_clause = Clause(literals)
+        highest_level = levels[literals[0] >> 1]
+        second_level = levels[literals[1] >> 1]
+        if highest_level > second_level:
+            assignment_list.backtrack(second_level)
+            self.propagator.watch(blocking_clause)
+            assignment_list.assign_literal(literals[0], blocking_clause)
+        else:
+            # Two literals of the highest level, both unassigned after backjumping below it
+            assignment_list.backtrack(highest_level - 1)
+            self.propagator.watch(blocking_clause)
+        return blocking_clause
+
+    def block_at_root(self, literals):
+        """ Adds the blocking clause of a model that is no longer on the trail, at the root level
+        returns: the blocking Clause, None if it is satisfied at the root level, False if there is no other model
+        """
+        self.assignment_list.backtrack(0)
+        return add_clause_at_root(self.assignment_list, self.propagator, literals)
+
+    def verify(self):
+        """ returns: whether the last model satisfies every clause added so far """
+        return self.model is not None and verify(self.model, self.clauses)
+
+def load_solver(filename, stream=None, cache=None, **options):
+    """ Creates a Solver from a DIMACS file, see parse_cnf for the parameters and Solver for the options """
+    _, clauses = parse_cnf(filename, stream, cache)
+    return Solver(clauses, **options)
+
+def enumerate_models(filename, projection=None, limit=None, **options):
+    """ Generates the models of a DIMACS file, see Solver.models """
+    return load_solver(filename, **options).models(projection=projection, limit=limit)
@@ -1,150 +1,317 @@
 import random
-from functools import reduce
-from collections import defaultdict
 import logging
+import time
+import json
 
 NOT = '-'
 
-class Literal:
-    """ Representation of a literal """
-
-    def __init__(self, literal_string):
-        self.value = literal_string
-
-    def negation(self):
-        """ Returns a negated copy of the Literal """
-        if self.is_negation():
-            return Literal(self.value[1:])
-        return Literal(NOT + self.value)
-
-    def is_negation(self):
-        return NOT == self.value[0]
-
-    def is_negation_of(self, other):
-        """ Checks it the other Literal is the negation of the current Literal """
-        return other == self.negation()
-
-    def get_variable(self):
-        """ Returns the variable string of the Literal """
-        if self.is_negation():
-            return self.value[1:]
-        return self.value
-
-    def evaluate(self, variable_assignment):
-        """ Given a variable assignment evaluate the boolean value of the literal """
-        variable_value = variable_assignment[self.get_variable()]
-        return (not self.is_negation() and variable_value) or (self.is_negation() and not variable_value)
-
-    @staticmethod
-    def init_from_variable(variable_string, value):
-        """ Creates a Literal from the a variable string (not negated) and its boolean value """
-        if value:
-            return Literal(variable_string)
-        return Literal(NOT + variable_string)
-
-    def __eq__(self, other):
-        return self.value == other.value
-    
-    def __str__(self):
-        return self.value
-    
-    def __lt__(self, other):
-        return self.value < other.value
+# Branching heuristics
+VSIDS = 'vsids'
+RANDOM = 'random'
+
+# Value of a decision on a variable that has no saved phase
+POLARITY_VSIDS = 'vsids' # The literal with the higher VSIDS score
+POLARITY_TRUE = 'true'
+POLARITY_FALSE = 'false'
+POLARITY_RANDOM = 'random'
+
+# Default schedule of the learnt clause database reduction
+REDUCE_INTERVAL = 2000
+REDUCE_INCREMENT = 300
+GLUE_LBD = 2
+
+#################################################################################
+# Literals are encoded as integers: variable v is 2v and its negation is 2v + 1 #
+#################################################################################
+
+def to_literal(literal_string):
+    """ Converts a DIMACS literal string (e.g. '-3') to its integer encoding """
+    value = int(literal_string)
+    if value < 0:
+        return (-value << 1) | 1
+    return value << 1
+
+def literal_to_string(literal):
+    """ Converts an integer encoded literal back to its DIMACS string, only used when writing output """
+    if literal & 1:
+        return NOT + str(literal >> 1)
+    return str(literal >> 1)
+
+def negation(literal):
+    """ Returns the negation of a literal """
+    return literal ^ 1
+
+def is_negation(literal):
+    return literal & 1 == 1
+
+def get_variable(literal):
+    """ Returns the variable (int) of the literal """
+    return literal >> 1
+
+def literal_from_variable(variable, value):
+    """ Creates a literal from a variable (int) and its boolean value """
+    if value:
+        return variable << 1
+    return (variable << 1) | 1
+
+class VariableHeap:
+    """ Indexed binary max-heap of variables, ordered by a score function
+    Used by VSIDS so that picking the unassigned variable with the highest score costs O(log n)
+
+    :attribute heap: List of the variables in heap order
+    :attribute positions: List containing the index of each variable in the heap (-1 if not in the heap), indexed by the variable
+    :attribute score: Function that returns the score of a variable
+    """
 
-    def __hash__(self):
-        return hash(self.value)
+    def __init__(self, variables, num_variables, score):
+        self.score = score
+        self.positions = [-1] * (num_variables + 1)
+        self.heap = []
+        for variable in variables:
+            self.positions[variable] = len(self.heap)
+            self.heap.append(variable)
+        for index in reversed(range(len(self.heap) // 2)):
+            self.sift_down(index)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def grow(self, num_variables):
+        """ Makes room for the variables up to num_variables, which are not in the heap yet """
+        self.positions.extend([-1] * (num_variables + 1 - len(self.positions)))
+
+    def __contains__(self, variable):
+        return self.positions[variable] != -1
+
+    def push(self, variable):
+        """ Inserts a variable if it is not in the heap already """
+        if self.positions[variable] != -1:
+            return
+        self.positions[variable] = len(self.heap)
+        self.heap.append(variable)
+        self.sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        """ Removes and returns the variable with the highest score """
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.positions[top] = -1
+        if len(heap) > 0:
+            heap[0] = last
+            self.positions[last] = 0
+            self.sift_down(0)
+        return top
+
+    def increased(self, variable):
+        """ Restores the heap order after the score of a variable increased """
+        if self.positions[variable] != -1:
+            self.sift_up(self.positions[variable])
+
+    def sift_up(self, index):
+        heap = self.heap
+        positions = self.positions
+        variable = heap[index]
+        variable_score = self.score(variable)
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = heap[parent_index]
+            if self.score(parent) >= variable_score:
+                break
+            heap[index] = parent
+            positions[parent] = index
+            index = parent_index
+        heap[index] = variable
+        positions[variable] = index
+
+    def sift_down(self, index):
+        heap = self.heap
+        positions = self.positions
+        size = len(heap)
+        variable = heap[index]
+        variable_score = self.score(variable)
+        while True:
+            child_index = 2 * index + 1
+            if child_index >= size:
+                break
+            child_score = self.score(heap[child_index])
+            if child_index + 1 < size:
+                right_score = self.score(heap[child_index + 1])
+                if right_score > child_score:
+                    child_index += 1
+                    child_score = right_score
+            if child_score <= variable_score:
+                break
+            child = heap[child_index]
+            heap[index] = child
+            positions[child] = index
+            index = child_index
+        heap[index] = variable
+        positions[variable] = index
 
 class AssignmentList:
-    """ Variables assignments are stored in the assignment list
+    """ Variables assignments are stored in the assignment list as a trail
     
-    :attribute decision_level: The decision level of the current assignments
-    :attribute variables: Dictionary containing the variables and the past assignments assigned to them
-        - { variable string -> assignment history [True / False] (empty if not assigned a variable before) }
-    :attribute assignments: Dictionary containing the variable and the decision level it was assigned
-        - { variable string -> decision level }
-    :attribute vsids: Dictionary containing the literal and its count. Used in the pickbranching heuristic
-    :attribute branching_count: Int counter that indicates the number of times a variable is re-assigned due to a backtrack
+    :attribute decision_level: The decision level of the current assignments (0 is the root level)
+    :attribute variables: List of the variables (int) that appear in the clauses
+    :attribute values: List containing the value of every literal, indexed by the literal
+        - [ literal int -> True / False / None (unassigned) ]
+    :attribute levels: List containing the decision level each variable was assigned at, indexed by the variable
+    :attribute reasons: List containing the clause that implied each variable (None for decisions), indexed by the variable
+    :attribute trail: List of literals in the order they were assigned (decisions and implications)
+    :attribute trail_limits: List of the trail index at which each decision level starts
+        - trail_limits[i] is the position of the decision literal of level i + 1
+    :attribute propagation_head: Index of the next literal on the trail that has yet to be propagated
+    :attribute vsids: List containing the score of every literal, indexed by the literal. Used in the pickbranching heuristic
+    :attribute vsids_increment: Amount a literal is bumped by, grows after every conflict instead of decaying every score (EVSIDS)
+    :attribute vsids_heap: VariableHeap of the unassigned variables, ordered by the highest score of their two literals
+    :attribute branching_heuristic: VSIDS (default) or RANDOM
+    :attribute polarity: Value of a decision on a variable without a saved (or target) phase, one of the POLARITY constants
+    :attribute random: random.Random used by the random choices, see randomize()
+    :attribute branching_count: Int counter that indicates the number of decisions made
+    :attribute saved_phases: List containing the last value of every variable before it was unassigned, indexed by the variable.
+        Decisions reuse the saved phase, so backtracking and restarting do not throw away the progress made.
+    :attribute target_phase: Boolean flag, when set decisions prefer the target phases over the saved phases
+    :attribute target_phases: List of the values of the longest trail since the last restart, indexed by the variable
+    :attribute best_phases: List of the values of the longest trail so far, the target phases start from it after a restart
     """
 
     def __init__(self, clauses):
-        self.decision_level = -1
-        self.assignments = {}
-        self.vsids = defaultdict(float)
-        self.vsids_division_constant = 2
-        self.vsids_backtrack_threshold = 10
+        self.decision_level = 0
+        variables = set()
+        for clause in clauses:
+            for literal in clause.literals:
+                variables.add(literal >> 1)
+        self.variables = sorted(variables)
+        self.num_variables = max(variables, default=0)
+        self.vsids = [0.0] * (2 * self.num_variables + 2)
         for clause in clauses:
             for literal in clause.literals:
                 self.vsids[literal] += 1
-                variable = literal.get_variable()
-                self.assignments[variable] = []
-        self.decision_levels = {}
+        # Scores are divided by vsids_division_constant every vsids_backtrack_threshold conflicts,
+        # which is done lazily by growing the increment by the equivalent factor after every conflict
+        self.vsids_division_constant = 2
+        self.vsids_backtrack_threshold = 10
+        self.vsids_increment = 1.0
+        self.vsids_growth = self.vsids_division_constant ** (1 / self.vsids_backtrack_threshold)
+        self.vsids_rescale_limit = 1e100
+        vsids = self.vsids
+        self.vsids_heap = VariableHeap(self.variables, self.num_variables,
+            lambda x: max(vsids[x << 1], vsids[(x << 1) | 1]))
+        self.values = [None] * (2 * self.num_variables + 2)
+        self.levels = [-1] * (self.num_variables + 1)
+        self.reasons = [None] * (self.num_variables + 1)
+        self.trail = []
+        self.trail_limits = []
+        self.propagation_head = 0
+        self.branching_heuristic = VSIDS
+        self.polarity = POLARITY_VSIDS
+        self.random = random.Random()
         self.branching_count = 0
         self.backtrack_count = 0
+        self.saved_phases = [None] * (self.num_variables + 1)
+        self.target_phase = False
+        self.target_phases = [None] * (self.num_variables + 1)
+        self.target_size = 0
+        self.best_phases = [None] * (self.num_variables + 1)
+        self.best_size = 0
 
     ###################################################
     # Methods for variable assignment / pickbranching #
     ###################################################
 
-    def assign_next(self, did_backtrack):
-        """ Assigns the next variable with a boolean value,
-        If the algorithm did backtrack, look to replace the variable at the current decision level
+    def decide(self, literal=None):
+        """ Picks the next decision literal, opens a new decision level and puts it on the trail
+
+        :param literal: the (unassigned) decision literal, picked by the branching heuristic if None
+        returns: the decision literal, or None if there are no unassigned variables left
+        """
+        if literal is None:
+            variable, value = self.pickbranching_variable()
+            if variable is None or value is None:
+                return None
+            literal = literal_from_variable(variable, value)
+        self.trail_limits.append(len(self.trail))
+        self.decision_level += 1
+        self.assign_literal(literal, None)
+        return literal
+
+    def new_decision_level(self):
+        """ Opens a decision level without a decision, for an assumption that is already True """
+        self.trail_limits.append(len(self.trail))
+        self.decision_level += 1
+
+    def assign_literal(self, literal, reason):
+        """ Makes a literal True at the current decision level and pushes it onto the trail
+
+        :param literal: the literal to be made True
+        :param reason: the Clause that implied the literal, None if it is a decision
         """
-        next_variable, value = self.pickbranching_variable(did_backtrack)
-        if next_variable is None or value is None:
-            return (None, None)
-        if not did_backtrack:
-            self.decision_level += 1
-        self.assignments[next_variable].append(value)
-        self.decision_levels[next_variable] = self.decision_level
-        return (Literal(next_variable), value)
-
-    def pickbranching_variable(self, did_backtrack):
-        # Choose pickbranching implementation here.
+        self.values[literal] = True
+        self.values[literal ^ 1] = False
+        variable = literal >> 1
+        self.levels[variable] = self.decision_level
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def value_of(self, literal):
+        """ Returns the boolean value of a literal under the current assignment, None if unassigned """
+        return self.values[literal]
+
+    def pickbranching_variable(self):
         self.branching_count += 1
-        return self.pickbranching_variable_vsids(did_backtrack)
-        # return self.pickbranching_variable_random(did_backtrack)
+        if self.branching_heuristic == RANDOM:
+            return self.pickbranching_variable_random()
+        return self.pickbranching_variable_vsids()
 
-    def pickbranching_variable_vsids(self, did_backtrack):
+    def pickbranching_variable_vsids(self):
         """ Pickbranching heuristic to decide which variable assignment to choose
-        Currently implementing VSIDS:
+        Currently implementing VSIDS: picks the unassigned variable with the highest score.
+        Its value is the target phase (if enabled), else the saved phase, else the value of its literal with the higher score.
         """
-        if did_backtrack: # Select the variable at the current decision_level
-            self.did_backtrack_divide_vsids()
-            variable = list(filter(lambda x: x[1] == self.decision_level, self.decision_levels.items()))[0][0]
-            value = not self.assignments[variable][-1]
-            
-            return (variable, value)
-        else:
-            # Predicate: variable must be unassigned at the current decision level
-            predicate = lambda x: x[0].get_variable() not in self.decision_levels
-            literal = max(filter(predicate, self.vsids.items()), key=lambda x: x[1])[0]
-            variable = literal.get_variable()
-            value = not literal.is_negation()
-            return (variable, value)
-
-    def pickbranching_variable_random(self, did_backtrack):
+        heap = self.vsids_heap
+        while len(heap) > 0:
+            variable = heap.pop()
+            if self.values[variable << 1] is None:
+                return (variable, self.phase_of(variable))
+        return (None, None)
+
+    def phase_of(self, variable):
+        """ Returns the value a decision on the variable should give it """
+        value = None
+        if self.target_phase:
+            value = self.target_phases[variable]
+        if value is None:
+            value = self.saved_phases[variable]
+        if value is None:
+            polarity = self.polarity
+            if polarity == POLARITY_VSIDS:
+                value = self.vsids[variable << 1] >= self.vsids[(variable << 1) | 1]
+            elif polarity == POLARITY_RANDOM:
+                value = self.random.random() < 0.5
+            else:
+                value = polarity == POLARITY_TRUE
+        return value
+
+    def pickbranching_variable_random(self):
         """ Pickbranching to decide which variable to pick for assignment next
             - Temporarily finds the first unassigned variable and assigns a random value
         """
-        variable = None
-        if did_backtrack: # Select the variable at the current decision_level
-            self.did_backtrack_divide_vsids()
-            variable = list(filter(lambda x: x[1] == self.decision_level, self.decision_levels.items()))[0][0]
-        else:
-            for var, assignment in self.assignments.items():
-                if len(assignment) == 2 or var in self.decision_levels:
-                    continue
-                variable = var
-                break
-        if variable is None or len(self.assignments[variable]) == 2:
-            return (None, None)
-        if len(self.assignments[variable]) == 0:
-            values = [True, False]
-            random.shuffle(values)
-            value = values[0]
-        else:
-            value = not self.assignments[variable][-1]
-        return (variable, value)
+        for variable in self.variables:
+            if self.values[variable << 1] is None:
+                return (variable, self.random.choice([True, False]))
+        return (None, None)
+
+    def randomize(self, seed):
+        """ Seeds the random choices, and breaks the ties between the initial VSIDS scores randomly
+        (scores are occurrence counts, so a jitter below 1 only reorders variables with equal counts)
+        """
+        self.random = random.Random(seed)
+        vsids = self.vsids
+        for literal in range(len(vsids)):
+            vsids[literal] += self.random.random() * 0.5
+        self.vsids_heap = VariableHeap(filter(lambda x: x in self.vsids_heap, self.variables), self.num_variables,
+            self.vsids_heap.score)
 
     #####################
     # Methods for VSIDS #
@@ -152,56 +319,102 @@ class AssignmentList:
 
     def update_vsids_with(self, clause):
         """ When a clause is learnt,
-        update vsids by incrementing all the new literal counters by 1
+        update vsids by incrementing all the new literal counters by the current increment
         """
+        vsids = self.vsids
+        increment = self.vsids_increment
+        heap = self.vsids_heap
+        highest_score = 0
         for literal in clause.literals:
-            self.vsids[literal] += 1
+            vsids[literal] += increment
+            highest_score = max(highest_score, vsids[literal])
+            heap.increased(literal >> 1)
+        if highest_score > self.vsids_rescale_limit:
+            self.rescale_vsids()
 
     def did_backtrack_divide_vsids(self):
-        """ Called everytime it backtracks, keeps counter and
-        decides whether to divide the vsids values
+        """ Called everytime it backtracks,
+        decays every score lazily by growing the increment used by future bumps
         """
         self.backtrack_count += 1
-        if self.backtrack_count < self.vsids_backtrack_threshold:
-            return
-        self.backtrack_count = 0
-        for variable in self.vsids:
-            self.vsids[variable] /= self.vsids_division_constant
+        self.vsids_increment *= self.vsids_growth
+        if self.vsids_increment > self.vsids_rescale_limit:
+            self.rescale_vsids()
+
+    def rescale_vsids(self):
+        """ Divides every score and the increment to keep them as floats, the order of the scores is unchanged """
+        limit = self.vsids_rescale_limit
+        vsids = self.vsids
+        for literal in range(len(vsids)):
+            vsids[literal] /= limit
+        self.vsids_increment /= limit
 
     ###############################################
     # Methods for backtracking the AssignmentList #
     ###############################################
 
-    def get_dl_variable_assignment(self, of_variable):
-        """ Gets the value assigned to a given variable and the decision level it was assigned """
-        if of_variable not in self.assignments or len(self.assignments[of_variable]) == 0:
-            return (None, None)
-        # Return the last assignment
-        value_assigned = self.assignments[of_variable][-1]
-        at_decision_level = self.decision_levels[of_variable]
-        return (value_assigned, at_decision_level)
-
-    def get_backtrack_decision_level(self, max_decision_level):
-        """ Gets the decision level that we can backtrack to:
-        max_decision_level might already have two previous assignments, so we might need to backtrack further by one.
-        Find the maximum decision_level <= max_decision_level that does already have two assignments
-
-        :param max_decision_level: Minimum decision level that lead to a contradiction (from conflict analysis)
-        """
-        predicate = lambda x: len(self.assignments[x[0]]) < 2 and x[1] <= max_decision_level
-        valid_items = list(filter(predicate, self.decision_levels.items()))
-        if len(valid_items) == 0:
-            return -1
-        return max(valid_items, key=lambda x: x[1])[1]
-
     def backtrack(self, to_decision_level):
-        """ Backtracks to the decision level """
+        """ Backtracks to the decision level by popping the trail,
+        only the variables assigned above the decision level are touched.
+        The values of the popped variables are kept as their saved phases.
+        """
+        if self.decision_level <= to_decision_level:
+            return
+        if self.target_phase and len(self.trail) > self.target_size:
+            self.update_target_phases()
+        values = self.values
+        reasons = self.reasons
+        saved_phases = self.saved_phases
+        heap = self.vsids_heap
+        limit = self.trail_limits[to_decision_level]
+        for literal in self.trail[limit:]:
+            values[literal] = None
+            values[literal ^ 1] = None
+            reasons[literal >> 1] = None
+            saved_phases[literal >> 1] = literal & 1 == 0
+            heap.push(literal >> 1)
+        del self.trail[limit:]
+        del self.trail_limits[to_decision_level:]
+        self.propagation_head = min(self.propagation_head, limit)
         self.decision_level = to_decision_level
-        items = list(self.decision_levels.items())
-        for variable, decision_level in items:
-            if decision_level > to_decision_level:
-                del self.decision_levels[variable]
-                self.assignments[variable] = []
+
+    def restart(self):
+        """ Backtracks to the root level, the target phases start again from the best phases """
+        self.backtrack(0)
+        if self.target_phase:
+            self.target_phases = self.best_phases.copy()
+            self.target_size = 0
+
+    def update_target_phases(self):
+        """ Called with a trail longer than the target (and possibly the best) one, records its values """
+        target_phases = self.target_phases
+        for literal in self.trail:
+            target_phases[literal >> 1] = literal & 1 == 0
+        self.target_size = len(self.trail)
+        if self.target_size > self.best_size:
+            self.best_phases = target_phases.copy()
+            self.best_size = self.target_size
+
+    def add_variables(self, variables):
+        """ Adds variables that did not appear in the clauses so far (e.g. from a clause added incrementally) """
+        new_variables = set(variables).difference(self.variables)
+        if len(new_variables) == 0:
+            return
+        num_variables = max(self.num_variables, max(new_variables))
+        if num_variables > self.num_variables:
+            growth = num_variables - self.num_variables
+            self.vsids.extend([0.0] * (2 * growth))
+            self.values.extend([None] * (2 * growth))
+            self.levels.extend([-1] * growth)
+            self.reasons.extend([None] * growth)
+            self.saved_phases.extend([None] * growth)
+            self.target_phases.extend([None] * growth)
+            self.best_phases.extend([None] * growth)
+            self.vsids_heap.grow(num_variables)
+            self.num_variables = num_variables
+        self.variables = sorted(new_variables.union(self.variables))
+        for variable in new_variables:
+            self.vsids_heap.push(variable)
 
     ##########################
     # AssignmentList Helpers #
@@ -209,251 +422,595 @@ class AssignmentList:
 
     def all_values_assigned(self):
         """ Checks if all values are assigned """
-        values_assigned = tuple(map(lambda x: len(x) != 0, self.assignments.values()))
-        return reduce(lambda x, y: x and y, values_assigned)
+        return len(self.trail) == len(self.variables)
 
     def get_variable_assignment(self):
-        """ Returns a dictionary of the final variable assignment """
+        """ Returns a dictionary of the final variable assignment
+            - { variable string -> True / False }
+        """
         final = {}
-        for variable, assignments in self.assignments.items():
-            if len(assignments) == 0:
-                continue
-            final[variable] = assignments[-1]
+        for literal in self.trail:
+            final[str(literal >> 1)] = literal & 1 == 0
         return final
 
     def __str__(self):
-        assignments = list(filter(lambda x: len(x[1]) > 0, self.assignments.items()))
-        assignments = list(map(lambda x: str(x[0]) + ":" + str(x[1][-1]), assignments))
-        return '(' + ', '.join(assignments) + ')'
+        return '(' + ', '.join(map(literal_to_string, self.trail)) + ')'
 
 class Clause:
     """ Representation of a clause - contains multiple literals
+    Clauses are never copied when variables are assigned, the assignment lives in the AssignmentList.
     
-    :attribute literals: a tuple of literals it contains
+    :attribute literals: a list of literals it contains (only reordered by the unit propagation)
     :attribute decision_level: the decision level it was created at
-    :attribute evaluated_true: when a clause is evaluated to be True through variable assignment
-        - This is set to True, else False
-    :attribute previous_clause: a link to the previous clause it was created from (for backtracking)
-    :attribute propagated_by: a link to the unit clause it was propagated with
-    :attribute unit_clause_propagated: Only used for unit clauses as a flag to indicate if it has been propagated before
     :attribute learnt: Boolean flag to indicate whether or not this is a learnt clause (from a refutation)
+    :attribute resolution_steps: for a derived clause, the clause it was resolved from followed by the
+        reason clauses it was resolved with and the variable resolved on - [(Clause, None), (Clause, variable), ...]
+    :attribute root_variables: for a derived clause, the variables assigned at the root level that were left out of it
+    :attribute lbd: for a learnt clause, the number of distinct decision levels of its literals when it was learnt
+    :attribute activity: for a learnt clause, bumped everytime it takes part in a conflict analysis
+    :attribute deleted: Boolean flag set when a learnt clause is removed from the ClauseDatabase
     """
 
-    def __init__(self, literals, decision_level = -1, evaluated_true = False,
-        previous_clause = None, propagated_by = None, assigned_variables = set()):
+    def __init__(self, literals, decision_level = 0):
         self.literals = literals
-        self.assigned_variables = assigned_variables
         self.decision_level = decision_level
-        self.evaluated_true = evaluated_true
-        self.previous_clause = previous_clause
-        self.propagated_by = propagated_by
-        self.unit_clause_propagated = False
         self.learnt = False
+        self.resolution_steps = None
+        self.root_variables = []
+        self.lbd = 0
+        self.activity = 0.0
+        self.deleted = False
 
     def is_unit_clause(self):
         return len(self.literals) == 1
 
-    def propagate_with(self, unit_clause, at_decision_level):
-        """ Resolves the current Clause with another Clause, generating a new Clause
-    
-        :param unit_clause: the unit clause being resolved with the current clause
-        :param at_decision_level: the decision level at which the new clause is being created
-        returns: a newly clause if propagated, else itself
-        """
-        literal = unit_clause.literals[0]
-        if literal.negation() not in self.literals:
-            return self
-        new_literals = tuple(filter(lambda x: x != literal.negation(), self.literals))
-        
-        assigned_variables = self.assigned_variables.union(unit_clause.assigned_variables)
-        new_clause = Clause(new_literals, at_decision_level, False, self, unit_clause, assigned_variables)
-        return new_clause
-
-    def assign(self, variable, with_value, at_decision_level):
-        """ Assigns a value to a variable in the clause
-
-        :param variable: the variable that is being assigned (class is a literal, but always non-negated)
-        :param with_value: the boolean value assigned to the variable
-        :param at_decision_level: the decision level at which the variable assignment is happening
-        """
-        # Situation 1: When the clause becomes True by variable assignment:
-        #   Assigning True to a variable that exists in the clause or
-        #   Assigning False to a variable has its negation in the clause 
-        if with_value and variable in self.literals:
-            assigned_variables = self.assigned_variables.union([variable])
-            return Clause(self.literals, at_decision_level, True, self, None, assigned_variables)
-        elif not with_value and variable.negation() in self.literals:
-            assigned_variables = self.assigned_variables.union([variable])
-            return Clause(self.literals, at_decision_level, True, self, None, assigned_variables)
-        
-        # Situation 2: When a literal in the clause no longer needs to be considered because it is False
-        #   Remove any instance of the literal in the clause and return a new clause
-        if with_value and variable.negation() in self.literals:
-            new_literals = tuple(filter(lambda x: x != variable.negation(), self.literals))
-            assigned_variables = self.assigned_variables.union([variable.negation()])
-            return Clause(new_literals, at_decision_level, False, self, None, assigned_variables)
-        elif not with_value and variable in self.literals:
-            new_literals = tuple(filter(lambda x: x != variable, self.literals))
-            assigned_variables = self.assigned_variables.union([variable])
-            return Clause(new_literals, at_decision_level, False, self, None, assigned_variables)
-
-        # A new clause is NOT created
-        return self
-
-
-    def backtrack(self, to_decision_level):
-        """ Backtracks to a given decision level by traversing previous_clause(s) until the 
-        current decision_level <= to_decision_level
-        """
-        to_clause = self
-        while to_clause.decision_level > to_decision_level and to_clause.previous_clause is not None:
-            to_clause = to_clause.previous_clause
-        return to_clause
-
     def is_empty_clause(self):
         """ A contradiction is found by checking if any newly generated clause is empty """
         return len(self.literals) == 0
 
-    def learn_new_clause(self, assignment_list):
-        """ Used when the clause is empty and hence a contradiction
-        Recursively searches the previous_clause(s) and propagated_by unit clauses to their base clauses with DFS
-        and creates a set of variables that lead to the contradiction. From there, generates a new clause to be learnt.
-        
-        :param assignment_list: The current variable AssignmentList that leads to the contradiction
-        returns: a newly learned clause (negation of the conjunction of resultant variable assignments)
-            and the minimum decision level that started the contradiction
-        """
-        variable_set = set()
-        visited_clauses = set() # To short-cuircuit the dfs
-
-        def dfs(clause):
-            """ Helper recursive function """
-            if clause is None or clause in visited_clauses:
-                return
-            # Mark current clause as visited
-            visited_clauses.add(clause)
-            # Recurse through parent clauses
-            dfs(clause.previous_clause)
-            dfs(clause.propagated_by)
-
-            # Check if base clause has been reached
-            if clause.previous_clause is None and clause.propagated_by is None:
-                variables = list(map(lambda x: x.get_variable(), clause.literals))
-                variable_set.update(variables)
-
-        dfs(self)
-        new_literals = []
-        max_decision_level = 0
-        max_variable = None
-        for variable in variable_set:
-            value_assigned, at_decision_level = assignment_list.get_dl_variable_assignment(variable)
-            # Variables that were not assigned a value should not be added to the learnt clause
-            if value_assigned is None:
-                continue
-            # max_decision_level = max(max_decision_level, at_decision_level)
-            if max_decision_level < at_decision_level:
-                max_decision_level = at_decision_level
-                max_variable = variable
-            # Flip the previous value assigned to the variable
-            literal = Literal.init_from_variable(variable, not value_assigned)
-            new_literals.append(literal)
-        
-        assert(len(new_literals) != 0, "Newly learned clause should have non-empty literal list")
-        
-        # Newly learnt clause should start at decision level 0
-        learnt_clause = Clause(tuple(new_literals), 0, False, self, None, set())
-        learnt_clause.learnt = True
-        return (learnt_clause, max_decision_level, max_variable)
-
     def evaluate(self, variable_assignment):
         """ Given a variable assignment, evaluates the boolean value of the clause by:
         Evaluating the disjuction of the evaluation of each literal
         """
         result = False
         for literal in self.literals:
-            result = result or literal.evaluate(variable_assignment)
+            variable_value = variable_assignment[str(literal >> 1)]
+            result = result or (variable_value != (literal & 1 == 1))
         return result
 
     def __str__(self):
-        if self.evaluated_true:
-            return '(TRUE)'
-        return '(' + ', '.join(map(str, self.literals)) + ')'
-
-    def hidden_str(self):
-        if self.evaluated_true:
-            return '(TRUE)'
-        sorted_assigned_variables = sorted(list(self.assigned_variables))
-        return "(" + " ".join(map(str, self.literals)) + " " \
-            + " ".join(map(lambda x: "*" + str(x), sorted_assigned_variables)) + ")"
+        return '(' + ', '.join(map(literal_to_string, self.literals)) + ')'
 
     def output_format(self):
-        if len(self.literals) == 0 and len(self.assigned_variables) == 0:
-            return "-1"
-        space = " "
         if len(self.literals) == 0:
-            space = ""
-        return " ".join(map(str, self.literals)) + space \
-            + " ".join(map(str, self.assigned_variables))
+            return "-1"
+        return " ".join(map(literal_to_string, self.literals))
 
     #####################################################
     # Methods to used in generating contradiction proof #
     #####################################################
 
-    def generate_contradiction_proof(self):
-        """ Generates the proof of contradiction """
-        assert(self.is_empty_clause(), "Should only be generating a proof for contradictions (empty clauses)")
+    def generate_contradiction_proof(self, assignment_list):
+        """ Generates the proof of contradiction
+        The resolvents in between the resolution steps of each derived clause are only created here.
+
+        :param assignment_list: the AssignmentList the contradiction was found with, its root level reasons are
+            used to resolve away the root_variables of the derived clauses
+        returns: list of (previous clause, propagated by clause, resultant clause) resolutions and the clauses used
+        """
+        assert self.is_empty_clause(), "Should only be generating a proof for contradictions (empty clauses)"
         proofs = []
         # Used to short-circuit the DFS
         visited_clauses = set()
         used_clauses = set()
 
-        def dfs(clause):
-            if clause is None or clause in visited_clauses:
-                return
-            if not clause.previous_clause and not clause.propagated_by: # Root clause
-                visited_clauses.add(clause)
-                return
-
-            # if clause.learnt:
-            #     logging.debug("GENERATING PROOF FOR LEARNT CLAUSE: " + str(clause))
-            # else:
-            #     logging.debug("Proof for Clause: " + clause.hidden_str())
-
+        root_trail = assignment_list.trail
+        if len(assignment_list.trail_limits) > 0:
+            root_trail = root_trail[:assignment_list.trail_limits[0]]
+        root_positions = {}
+        for position, literal in enumerate(root_trail):
+            root_positions[literal >> 1] = position
+
+        def root_resolution_steps(root_variables):
+            """ Reasons needed to resolve away the root variables, in reverse trail order """
+            involved = set()
+            stack = list(root_variables)
+            while len(stack) > 0:
+                variable = stack.pop()
+                if variable in involved:
+                    continue
+                involved.add(variable)
+                stack.extend(map(lambda x: x >> 1, assignment_list.reasons[variable].literals))
+            ordered = sorted(involved, key=lambda x: root_positions[x], reverse=True)
+            return list(map(lambda x: (assignment_list.reasons[x], x), ordered))
+
+        # Iterative post-order DFS, as the derivations of learnt clauses can be deeper than the recursion limit
+        stack = [(self, None)]
+        while len(stack) > 0:
+            clause, steps = stack.pop()
+            if steps is not None:
+                # Current clause is the result of a chain of resolutions
+                resolvent = steps[0][0]
+                for index, (reason, variable) in enumerate(steps[1:]):
+                    if index == len(steps) - 2:
+                        new_resolvent = clause
+                    else:
+                        new_resolvent, _ = resolvent.resolution_with(reason, variable)
+                    used_clauses.update([resolvent, reason, new_resolvent])
+                    proofs.append((resolvent, reason, new_resolvent))
+                    resolvent = new_resolvent
+                continue
+            if clause in visited_clauses:
+                continue
             visited_clauses.add(clause)
-            # if clause.previous_clause:
-            #     logging.debug("Recurse Previous: " + clause.previous_clause.hidden_str())
-            # if clause.propagated_by:
-            #     logging.debug("Recurse Propagated: " + clause.propagated_by.hidden_str())
-            dfs(clause.previous_clause)
-            dfs(clause.propagated_by)
-
-            # Current clause is a result of resolution between two clauses
-            if clause.previous_clause and clause.propagated_by:
-                used_clauses.update([clause.previous_clause, clause.propagated_by, clause])
-                resolution = (clause.previous_clause, clause.propagated_by, clause)
-                proofs.append(resolution)
-
+            if clause.resolution_steps is None: # Root clause
+                continue
+            steps = clause.resolution_steps + root_resolution_steps(clause.root_variables)
+            stack.append((clause, steps))
+            for step_clause, _ in steps:
+                stack.append((step_clause, None))
 
-        dfs(self)
         return proofs, used_clauses
 
-    def get_preceeding_clause(self):
-        """ A clause could be generated as a result of a variable assignment """
-        clause = self
-        while clause.previous_clause and not clause.propagated_by:
-            clause = clause.previous_clause
-        return clause
-
     def resolution_with(self, other, on_variable):
         """ Resolution between two clauses using a given variable """
-        assert(on_variable in map(lambda x: x.get_variable(), self.literals),
-            "Clause should contain the variable")
-        assert(on_variable in map(lambda x: x.get_variable(), other.literals),
-            "Clause should contain the variable")
-        all_literals = list(set(self.literals + other.literals))
-        filtered_literals = tuple(filter(lambda x: x.get_variable() != on_variable, all_literals))
-        variables = set(map(lambda x: x.get_variable(), filtered_literals))
+        assert on_variable in map(lambda x: x >> 1, self.literals), "Clause should contain the variable"
+        assert on_variable in map(lambda x: x >> 1, other.literals), "Clause should contain the variable"
+        all_literals = list(set(self.literals).union(other.literals))
+        filtered_literals = tuple(filter(lambda x: x >> 1 != on_variable, all_literals))
+        variables = set(map(lambda x: x >> 1, filtered_literals))
         is_true = len(variables) < len(filtered_literals)
-        new_clause = Clause(filtered_literals)
+        new_clause = Clause(list(filtered_literals))
         return (new_clause, is_true)
 
+
+class WatchedLiterals:
+    """ Two-watched-literal scheme used for unit propagation
+
+    Every clause with at least two literals watches its first two literals (literals[0] and literals[1]).
+    A clause only needs to be visited when one of its watched literals becomes False,
+    so propagating a literal only touches the clauses watching its negation.
+
+    :attribute watches: List containing the clauses watching each literal, indexed by the literal
+        - [ literal int -> [Clause] ]
+    """
+
+    def __init__(self, num_variables):
+        self.watches = [[] for _ in range(2 * num_variables + 2)]
+
+    def grow(self, num_variables):
+        """ Makes room for the literals of the variables up to num_variables """
+        self.watches.extend([] for _ in range(2 * num_variables + 2 - len(self.watches)))
+
+    def watch(self, clause):
+        """ Starts watching the first two literals of a clause (literals are reordered in place by propagate)
+        A learnt clause is watched right after backtracking, so its literals must be ordered by decision level (highest first)
+        """
+        self.watches[clause.literals[0]].append(clause)
+        self.watches[clause.literals[1]].append(clause)
+
+    def remove(self, clauses):
+        """ Stops watching clauses that were deleted (their deleted flag must be set) """
+        watched = set()
+        for clause in clauses:
+            watched.update(clause.literals[:2])
+        for literal in watched:
+            self.watches[literal] = [x for x in self.watches[literal] if not x.deleted]
+
+    def propagate(self, assignment_list):
+        """ Propagates every literal on the trail that has not been propagated yet
+
+        returns: None if succeeded, else the Clause that has all of its literals False
+        """
+        trail = assignment_list.trail
+        values = assignment_list.values
+        watches = self.watches
+        while assignment_list.propagation_head < len(trail):
+            false_literal = trail[assignment_list.propagation_head] ^ 1
+            assignment_list.propagation_head += 1
+
+            watchers = watches[false_literal]
+            kept = []
+            conflict = None
+            for index, clause in enumerate(watchers):
+                literals = clause.literals
+                # Keep the False literal at position 1
+                if literals[0] == false_literal:
+                    literals[0], literals[1] = literals[1], literals[0]
+                first_literal = literals[0]
+                # Clause is already True by its other watched literal
+                if values[first_literal] is True:
+                    kept.append(clause)
+                    continue
+                # Look for a replacement watch that is not False
+                for position in range(2, len(literals)):
+                    literal = literals[position]
+                    if values[literal] is not False:
+                        literals[1] = literal
+                        literals[position] = false_literal
+                        watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first_literal] is False:
+                        # Contradiction, the remaining watchers stay as they are
+                        kept.extend(watchers[index + 1:])
+                        conflict = clause
+                        break
+                    assignment_list.assign_literal(first_literal, clause)
+            watches[false_literal] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+class ClauseScan:
+    """ Reference unit propagation that rescans every clause until no unit clause is left
+    Slow (O(units x clauses)), but simple enough to be used for differential testing of WatchedLiterals.
+
+    :attribute clauses: List of the clauses with at least two literals
+    """
+
+    def __init__(self, num_variables):
+        self.clauses = []
+
+    def grow(self, num_variables):
+        pass
+
+    def watch(self, clause):
+        self.clauses.append(clause)
+
+    def remove(self, clauses):
+        self.clauses = [x for x in self.clauses if not x.deleted]
+
+    def propagate(self, assignment_list):
+        """ Propagates until there are no more unit clauses
+
+        returns: None if succeeded, else the Clause that has all of its literals False
+        """
+        values = assignment_list.values
+        found_unit_clause = True
+        while found_unit_clause:
+            found_unit_clause = False
+            for clause in self.clauses:
+                unassigned_literals = []
+                is_true = False
+                for literal in clause.literals:
+                    if values[literal] is True:
+                        is_true = True
+                        break
+                    if values[literal] is None:
+                        unassigned_literals.append(literal)
+                if is_true:
+                    continue
+                if len(unassigned_literals) == 0:
+                    return clause
+                if len(unassigned_literals) == 1:
+                    assignment_list.assign_literal(unassigned_literals[0], clause)
+                    found_unit_clause = True
+        assignment_list.propagation_head = len(assignment_list.trail)
+        return None
+
+class BitsetPropagator:
+    """ Unit propagation with bitsets (Python ints), for small formulas
+    Every clause is a bitmask over the literals (bit l for literal l), as the Matrix of old-files/helpers.py, and every
+    literal has a bitmask over the clauses containing it. The False literals and the satisfied clauses after every
+    prefix of the trail are bitmasks too, so propagating a literal is a few word-level AND/OR: the clauses to visit are
+    the occurrences of its negation that are not satisfied, and a visited clause without its False literals is a
+    conflict when nothing is left and a unit clause when a single bit is left. Backtracking drops the masks of the
+    popped prefixes. The masks grow with the number of clauses, so this only pays off for a few hundred variables.
+
+    :attribute clauses: List of the clauses, indexed by their bit (None once deleted)
+    :attribute indices: Dictionary of the bit of every clause { Clause -> index }
+    :attribute masks: List of the literal bitmask of every clause
+    :attribute occurrences: List of the clause bitmask of every literal, indexed by the literal
+    :attribute false_masks: List of the bitmasks of the False literals after trail[:i], for i up to the propagation head
+    :attribute satisfied_masks: List of the bitmasks of the clauses with a True literal after trail[:i]
+    :attribute deleted_count: Number of deleted clauses whose bits are not reused yet
+    """
+
+    def __init__(self, num_variables):
+        self.clauses = []
+        self.indices = {}
+        self.masks = []
+        self.occurrences = [0] * (2 * num_variables + 2)
+        self.false_masks = [0]
+        self.satisfied_masks = [0]
+        self.deleted_count = 0
+
+    def grow(self, num_variables):
+        self.occurrences.extend([0] * (2 * num_variables + 2 - len(self.occurrences)))
+
+    def watch(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.indices[clause] = index
+        mask = 0
+        for literal in clause.literals:
+            mask |= 1 << literal
+            self.occurrences[literal] |= 1 << index
+        self.masks.append(mask)
+
+    def remove(self, clauses):
+        """ Clears the bits of deleted clauses, and renumbers the clauses once half of them are deleted """
+        occurrences = self.occurrences
+        for clause in clauses:
+            index = self.indices.pop(clause, None)
+            if index is None:
+                continue
+            for literal in clause.literals:
+                occurrences[literal] &= ~(1 << index)
+            self.clauses[index] = None
+            self.masks[index] = 0
+            self.deleted_count += 1
+        if self.deleted_count > len(self.clauses) // 2:
+            self.compact()
+
+    def compact(self):
+        """ Gives the remaining clauses consecutive bits, the satisfied masks are then recomputed by propagate """
+        clauses = list(filter(lambda x: x is not None, self.clauses))
+        self.clauses = []
+        self.indices = {}
+        self.masks = []
+        self.occurrences = [0] * len(self.occurrences)
+        self.deleted_count = 0
+        for clause in clauses:
+            self.watch(clause)
+        self.satisfied_masks = None
+
+    def propagate(self, assignment_list):
+        """ Propagates every literal on the trail that has not been propagated yet
+
+        returns: None if succeeded, else the Clause that has all of its literals False
+        """
+        trail = assignment_list.trail
+        values = assignment_list.values
+        clauses = self.clauses
+        masks = self.masks
+        occurrences = self.occurrences
+        head = assignment_list.propagation_head
+        false_masks = self.false_masks
+        # The trail up to the propagation head is unchanged since its masks were computed
+        del false_masks[head + 1:]
+        if self.satisfied_masks is None:
+            self.satisfied_masks = [0]
+            for literal in trail[:head]:
+                self.satisfied_masks.append(self.satisfied_masks[-1] | occurrences[literal])
+        satisfied_masks = self.satisfied_masks
+        del satisfied_masks[head + 1:]
+        false = false_masks[head]
+        satisfied = satisfied_masks[head]
+        while head < len(trail):
+            literal = trail[head]
+            head += 1
+            assignment_list.propagation_head = head
+            false |= 1 << (literal ^ 1)
+            satisfied |= occurrences[literal]
+            false_masks.append(false)
+            satisfied_masks.append(satisfied)
+            # Literals assigned after the head are not in the masks yet: a clause they falsify is visited again
+            # when they are propagated, and a unit literal that is already True is skipped
+            candidates = occurrences[literal ^ 1] & ~satisfied
+            while candidates:
+                lowest = candidates & -candidates
+                candidates ^= lowest
+                index = lowest.bit_length() - 1
+                remaining = masks[index] & ~false
+                if remaining == 0:
+                    return clauses[index]
+                if remaining & (remaining - 1) == 0:
+                    unit_literal = remaining.bit_length() - 1
+                    if values[unit_literal] is None:
+                        assignment_list.assign_literal(unit_literal, clauses[index])
+        return None
+
+class ClauseDatabase:
+    """ Keeps track of the learnt clauses and periodically deletes the worse half of them,
+    so memory and the cost of propagation stay bounded on long runs.
+
+    A learnt clause is worse when it has a higher LBD (literal block distance), ties are broken by a lower activity.
+    Glue clauses (LBD <= glue_lbd) and clauses that are currently the reason of an assignment (locked) are never deleted.
+
+    :attribute learnt_clauses: List of the learnt clauses that have not been deleted
+    :attribute conflicts: Int counter of the number of conflicts so far
+    :attribute next_reduction: The number of conflicts at which the next reduction happens
+    :attribute reduce_interval: Number of conflicts between two reductions, grows by reduce_increment after each one
+    :attribute glue_lbd: Learnt clauses with an LBD up to this value are kept permanently
+    :attribute clause_increment: Amount the activity of a clause is bumped by, grows after every conflict
+    :attribute record_proof: Whether learnt clauses keep their resolution steps for the contradiction proof
+        (this keeps deleted clauses alive when they were used to derive another clause)
+    :attribute proof: DratWriter (see drat.py) the learnt and deleted clauses are streamed to, None if no proof is written
+    :attribute deleted_count: Int counter of the number of deleted clauses
+    """
+
+    def __init__(self, reduce_interval=REDUCE_INTERVAL, reduce_increment=REDUCE_INCREMENT, glue_lbd=GLUE_LBD,
+        record_proof=True, proof=None):
+        self.learnt_clauses = []
+        self.conflicts = 0
+        self.next_reduction = reduce_interval
+        self.reduce_interval = reduce_interval
+        self.reduce_increment = reduce_increment
+        self.glue_lbd = glue_lbd
+        self.clause_increment = 1.0
+        self.clause_decay = 0.999
+        self.record_proof = record_proof
+        self.proof = proof
+        self.deleted_count = 0
+
+    def add_learnt(self, clause, assignment_list):
+        """ Records a newly learnt clause (with at least two literals) with its LBD and initial activity """
+        levels = assignment_list.levels
+        clause.lbd = len(set(map(lambda x: levels[x >> 1], clause.literals)))
+        clause.activity = self.clause_increment
+        self.learnt_clauses.append(clause)
+
+    def bump(self, clause):
+        """ Bumps the activity of a learnt clause that took part in a conflict analysis """
+        clause.activity += self.clause_increment
+        if clause.activity > 1e20:
+            for learnt_clause in self.learnt_clauses:
+                learnt_clause.activity *= 1e-20
+            self.clause_increment *= 1e-20
+
+    def did_conflict(self):
+        """ Called after every conflict, decays the activities by growing the increment """
+        self.conflicts += 1
+        self.clause_increment /= self.clause_decay
+
+    def should_reduce(self):
+        return self.conflicts >= self.next_reduction
+
+    def reduce(self, assignment_list):
+        """ Deletes the worse half of the learnt clauses that are neither glue clauses nor locked
+        returns: the list of deleted clauses, which still have to be removed from the propagation
+        """
+        self.reduce_interval += self.reduce_increment
+        self.next_reduction = self.conflicts + self.reduce_interval
+
+        reasons = assignment_list.reasons
+        is_locked = lambda clause: any(map(lambda x: reasons[x >> 1] is clause, clause.literals))
+        kept = []
+        candidates = []
+        for clause in self.learnt_clauses:
+            if clause.lbd <= self.glue_lbd or is_locked(clause):
+                kept.append(clause)
+            else:
+                candidates.append(clause)
+        # Worst clauses first
+        candidates.sort(key=lambda x: (-x.lbd, x.activity))
+        deleted = candidates[:len(candidates) // 2]
+        for clause in deleted:
+            clause.deleted = True
+            if self.proof is not None:
+                self.proof.delete(clause.literals)
+        self.learnt_clauses = kept + candidates[len(deleted):]
+        self.deleted_count += len(deleted)
+        logging.debug("Reduced the learnt clauses: deleted " + str(len(deleted)) + ", kept " + str(len(self.learnt_clauses)))
+        return deleted
+
+class SearchLimits:
+    """ Limits of a cdcl() call, which gives up (returns None) once one of them is reached.
+    They are checked after every conflict.
+
+    :attribute conflict_limit: Maximum number of conflicts, None for no limit
+    :attribute deadline: time.time() after which the search gives up, None for no limit
+    :attribute stop: Event (threading or multiprocessing) that another thread or process sets to stop the search, None if unused
+    """
+
+    def __init__(self, conflict_limit=None, time_limit=None, stop=None):
+        """ :param time_limit: number of seconds from now """
+        self.conflict_limit = conflict_limit
+        self.deadline = None if time_limit is None else time.time() + time_limit
+        self.stop = stop
+
+    def reached(self, conflicts):
+        if self.conflict_limit is not None and conflicts >= self.conflict_limit:
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            return True
+        return self.stop is not None and self.stop.is_set()
+
+class SearchStatistics:
+    """ Counters of a search, filled by search() (and so by cdcl() and Solver) with plain integer and float updates
+    Every progress_interval conflicts a progress line is logged, and to_dict() / dump() give every counter as JSON.
+
+    :attribute decisions: Int counter of the decisions (assumptions included)
+    :attribute propagations: Int counter of the literals propagated
+    :attribute conflicts: Int counter of the conflicts
+    :attribute restarts: Int counter of the restarts
+    :attribute learnt_count: Int counter of the learnt clauses (unit clauses included)
+    :attribute learnt_literals: Sum of the sizes of the learnt clauses
+    :attribute max_learnt_size: Size of the longest learnt clause
+    :attribute learnt_lbd: Sum of the LBDs of the learnt clauses
+    :attribute glue_count: Int counter of the learnt clauses with an LBD of at most GLUE_LBD
+    :attribute lbd_histogram: List of the number of learnt clauses of every LBD, the last entry counts the higher LBDs
+    :attribute backjump_levels: Sum of the decision levels undone by the backjumps after the conflicts
+    :attribute max_backjump: Highest number of decision levels undone by a backjump
+    :attribute propagate_time: Seconds spent in unit propagation
+    :attribute analyze_time: Seconds spent in conflict analysis
+    :attribute decide_time: Seconds spent picking and making decisions
+    :attribute progress_interval: Number of conflicts between two progress lines, None for no progress lines
+    :attribute start_time: time.time() when the statistics were created
+    """
+
+    def __init__(self, progress_interval=None):
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        self.restarts = 0
+        self.learnt_count = 0
+        self.learnt_literals = 0
+        self.max_learnt_size = 0
+        self.learnt_lbd = 0
+        self.glue_count = 0
+        self.lbd_histogram = [0] * 17
+        self.backjump_levels = 0
+        self.max_backjump = 0
+        self.propagate_time = 0.0
+        self.analyze_time = 0.0
+        self.decide_time = 0.0
+        self.progress_interval = progress_interval
+        self.start_time = time.time()
+
+    def did_learn(self, clause, backjump):
+        """ Called after every conflict with the learnt clause (its LBD set) and the number of levels backjumped """
+        self.conflicts += 1
+        size = len(clause.literals)
+        self.learnt_count += 1
+        self.learnt_literals += size
+        if size > self.max_learnt_size:
+            self.max_learnt_size = size
+        lbd = clause.lbd
+        self.learnt_lbd += lbd
+        if lbd <= GLUE_LBD:
+            self.glue_count += 1
+        self.lbd_histogram[min(lbd, len(self.lbd_histogram) - 1)] += 1
+        self.backjump_levels += backjump
+        if backjump > self.max_backjump:
+            self.max_backjump = backjump
+        if self.progress_interval is not None and self.conflicts % self.progress_interval == 0:
+            logging.info(self.progress_line())
+
+    def average(self, total, count):
+        return round(total / count, 2) if count > 0 else 0
+
+    def progress_line(self):
+        elapsed = time.time() - self.start_time
+        return ("conflicts " + str(self.conflicts) + " | decisions " + str(self.decisions) + " | propagations/s "
+            + str(round(self.propagations / elapsed) if elapsed > 0 else 0) + " | restarts " + str(self.restarts)
+            + " | avg learnt size " + str(self.average(self.learnt_literals, self.learnt_count)) + " | avg lbd "
+            + str(self.average(self.learnt_lbd, self.learnt_count)) + " | " + str(round(elapsed, 1)) + "s")
+
+    def to_dict(self):
+        """ returns: dictionary of every counter and of the averages, for JSON """
+        return {
+            'decisions': self.decisions,
+            'propagations': self.propagations,
+            'conflicts': self.conflicts,
+            'restarts': self.restarts,
+            'learnt_clauses': self.learnt_count,
+            'average_learnt_size': self.average(self.learnt_literals, self.learnt_count),
+            'max_learnt_size': self.max_learnt_size,
+            'average_lbd': self.average(self.learnt_lbd, self.learnt_count),
+            'glue_clauses': self.glue_count,
+            'lbd_histogram': self.lbd_histogram,
+            'average_backjump': self.average(self.backjump_levels, self.conflicts),
+            'max_backjump': self.max_backjump,
+            'propagate_time': round(self.propagate_time, 6),
+            'analyze_time': round(self.analyze_time, 6),
+            'decide_time': round(self.decide_time, 6),
+            'elapsed_time': round(time.time() - self.start_time, 6),
+        }
+
+    def dump(self, sink):
+        """ Writes the counters as JSON to a file name or to an open text stream """
+        if isinstance(sink, str):
+            with open(sink, 'w') as file:
+                json.dump(self.to_dict(), file, indent=2)
+        else:
+            json.dump(self.to_dict(), sink, indent=2)
+
+    def summary(self):
+        statistics = self.to_dict()
+        return ", ".join(map(lambda x: x + " " + str(statistics[x]), ['decisions', 'propagations', 'conflicts',
+            'restarts', 'average_learnt_size', 'average_lbd', 'average_backjump', 'propagate_time', 'analyze_time',
+            'decide_time']))
@@ -1,36 +1,329 @@
+""" Batch benchmark runner
+
+Solves every CNF of the given folders, files and tar archives on a pool of worker processes and streams one result
+per instance (in the order they finish) to a JSON Lines or CSV file.
+Instances whose name starts with 'uf' are expected to be SAT and 'uuf' UNSAT, other answers are flagged as wrong.
+The time limit is checked by the search between conflicts, and enforced by the parent process: a worker still running
+TERMINATE_GRACE_PERIOD seconds after it is over is terminated, and its instance reported UNKNOWN.
+
+    python test_folder.py uf50 uuf50 uf75-325.tar.gz --time-limit 60 --output results.jsonl
+"""
 from cdcl import *
+from dimacs import is_archive, is_cnf
+from formula_cache import FormulaCache
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import multiprocessing.connection
 import os
+import sys
+import time
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+RESULT_FIELDS = ['instance', 'status', 'expected', 'wrong', 'time', 'decisions', 'conflicts', 'flips', 'flip_rate',
+    'peak_rss_kb', 'check_time', 'statistics', 'error']
+TERMINATE_GRACE_PERIOD = 2 # Seconds past the time limit before a worker is terminated
+
+def expected_status(name):
+    """ Expected answer from the SATLIB naming convention (uf = SAT, uuf = UNSAT), None if unknown """
+    name = os.path.basename(name)
+    if name.startswith('uuf'):
+        return UNSAT
+    if name.startswith('uf'):
+        return SAT
+    return None
+
+def instances(paths):
+    """ Generates the instances to solve: (name, filename, None) for files, (name, None, bytes) for archive members """
+    for path in paths:
+        if os.path.isdir(path):
+            for file in sorted(filter(is_cnf, os.listdir(path))):
+                filename = os.path.join(path, file)
+                yield (filename, filename, None)
+        elif is_archive(path):
+            for name, stream in iterate_archive(path):
+                yield (path + ':' + name, None, stream.read())
+        else:
+            yield (path, path, None)
+
+def peak_rss_kb():
+    """ Peak resident set size of the current process, in KB (None if it cannot be measured) """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin': # Reported in bytes instead of KB
+        peak //= 1024
+    return peak
+
+# Options and FormulaCache of a worker process, set by initialize_worker
+worker_options = None
+worker_cache = None
+
+def initialize_worker(options):
+    global worker_options, worker_cache
+    worker_options = options
+    worker_cache = FormulaCache() if options['cache'] else None
+
+def solve_instance(task):
+    """ Solves one instance in a worker process
+    :param task: (name, filename, data) where either the filename or the data (bytes of the CNF) is given
+    returns: dictionary with the RESULT_FIELDS
+    """
+    name, filename, data = task
+    options = worker_options
+    result = new_result(name)
+    start = time.time()
+    try:
+        limits = SearchLimits(options['conflict_limit'], options['time_limit'])
+        stream = None if data is None else io.BytesIO(data)
+        assignment_list, clauses = parse_cnf(filename or name, stream, worker_cache)
+        solved = solve_formula(assignment_list, clauses, options['propagation'], options['restarts'], limits=limits,
+            preprocess=options['preprocess'], probing=options['probing'], probe_interval=options['probe_interval'],
+            check_unsat=options['check_proofs'], local_search=options['local_search'],
+            hybrid_flips=options['hybrid_flips'])
+        result['status'] = status_of(solved.result)
+        if solved.searcher is not None:
+            result['flips'] = solved.searcher.flips
+            result['flip_rate'] = round(solved.searcher.flip_rate())
+        if solved.verified is False:
+            result['error'] = "model does not satisfy the formula"
+        result['decisions'] = solved.assignment_list.branching_count
+        result['conflicts'] = solved.clause_database.conflicts
+        result['statistics'] = solved.statistics.to_dict()
+        if solved.checker is not None:
+            result['check_time'] = round(solved.check_time, 6)
+            if not solved.checker.verified:
+                result['error'] = "proof rejected: " + solved.checker.error
+    except Exception as exception:
+        result['status'] = ERROR
+        result['error'] = repr(exception)
+    result['time'] = round(time.time() - start, 6)
+    result['peak_rss_kb'] = peak_rss_kb()
+    result['wrong'] = result['error'] is not None or (result['expected'] is not None
+        and result['status'] in (SAT, UNSAT) and result['status'] != result['expected'])
+    return result
+
+def new_result(name):
+    """ returns: the result of an instance that is not solved yet """
+    result = dict.fromkeys(RESULT_FIELDS)
+    result['instance'] = name
+    result['expected'] = expected_status(name)
+    result['status'] = UNKNOWN
+    result['wrong'] = False
+    return result
+
+def work(connection, options, isolate):
+    """ Worker process: solves the tasks received on the connection until it receives None (or after one with isolate) """
+    initialize_worker(options)
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        connection.send(solve_instance(task))
+        if isolate:
+            break
+    connection.close()
+
+class Worker:
+    """ A worker process and the instance it is solving
+
+    :attribute process: multiprocessing.Process running work()
+    :attribute connection: end of the pipe the tasks are sent to and the results received from
+    :attribute isolate: whether the worker exits after its first task
+    :attribute tasks: number of tasks sent to the worker
+    :attribute task: the task being solved, None if the worker is idle
+    :attribute start: time.time() when the task was sent
+    :attribute deadline: time.time() after which the worker is terminated, None without a time limit
+    """
+
+    def __init__(self, options, isolate):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=work, args=(child_connection, options, isolate), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.isolate = isolate
+        self.tasks = 0
+        self.task = None
+        self.start = None
+        self.deadline = None
+
+    def solve(self, task, time_limit):
+        self.task = task
+        self.tasks += 1
+        self.start = time.time()
+        self.deadline = None if time_limit is None else self.start + time_limit + TERMINATE_GRACE_PERIOD
+        self.connection.send(task)
+
+    def receive(self):
+        """ returns: the result of the task, an ERROR result if the worker died without one """
+        try:
+            result = self.connection.recv()
+        except (EOFError, OSError):
+            self.process.join()
+            result = new_result(self.task[0])
+            result['status'] = ERROR
+            result['error'] = "worker exited with code " + str(self.process.exitcode)
+            result['wrong'] = True
+            result['time'] = round(time.time() - self.start, 6)
+        self.task = None
+        return result
+
+    def terminate(self):
+        """ Terminates the worker past its deadline
+        returns: the UNKNOWN result of its task
+        """
+        self.close()
+        result = new_result(self.task[0])
+        result['time'] = round(time.time() - self.start, 6)
+        self.task = None
+        return result
+
+    def is_reusable(self):
+        """ returns: whether the worker can be sent another task """
+        return not (self.isolate and self.tasks > 0) and self.process.is_alive() and not self.connection.closed
+
+    def close(self):
+        """ Stops the worker, it is terminated if it is busy """
+        if self.task is None:
+            if self.is_reusable():
+                try:
+                    self.connection.send(None)
+                except OSError:
+                    pass
+            self.process.join(TERMINATE_GRACE_PERIOD)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+
+def solve_instances(tasks, options, jobs, isolate=False):
+    """ Solves the tasks on jobs worker processes, a worker past the time limit is terminated and replaced
+
+    :param isolate: whether every task is solved in a fresh process
+    yields: the result of every task, in the order they finish
+    """
+    tasks = iter(tasks)
+    time_limit = options['time_limit']
+    busy = []
+    try:
+        for task in tasks:
+            worker = Worker(options, isolate)
+            worker.solve(task, time_limit)
+            busy.append(worker)
+            if len(busy) == jobs:
+                break
+        while busy:
+            deadlines = [x.deadline for x in busy if x.deadline is not None]
+            timeout = max(0, min(deadlines) - time.time()) if deadlines else None
+            ready = multiprocessing.connection.wait([x.connection for x in busy], timeout)
+            for worker in list(busy):
+                if worker.connection in ready:
+                    result = worker.receive()
+                elif worker.deadline is not None and time.time() >= worker.deadline:
+                    result = worker.terminate()
+                else:
+                    continue
+                busy.remove(worker)
+                yield result
+                task = next(tasks, None)
+                if task is None or not worker.is_reusable():
+                    worker.close()
+                    if task is None:
+                        continue
+                    worker = Worker(options, isolate)
+                worker.solve(task, time_limit)
+                busy.append(worker)
+    finally:
+        for worker in busy:
+            worker.close()
+
+class ResultWriter:
+    """ Writes the results as JSON Lines or CSV (by the extension of the output file), flushed after every result """
+
+    def __init__(self, output_filename):
+        self.file = open(output_filename, 'w', newline='')
+        self.csv_writer = None
+        if output_filename.endswith('.csv'):
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, result):
+        if self.csv_writer is not None:
+            if result['statistics'] is not None:
+                result = dict(result, statistics=json.dumps(result['statistics']))
+            self.csv_writer.writerow(result)
+        else:
+            self.file.write(json.dumps(result) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Solves CNF folders, files and tar archives in parallel")
+    parser.add_argument('paths', nargs='+', help="folders, .cnf(.gz/.bz2/.xz) files or tar archives")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument('--time-limit', type=float, default=None, help="wall-clock seconds per instance")
+    parser.add_argument('--conflict-limit', type=int, default=None, help="conflicts per instance")
+    parser.add_argument('--restarts', default=GLUCOSE, choices=[NO_RESTARTS, LUBY, GEOMETRIC, GLUCOSE])
+    parser.add_argument('--propagation', default=WATCHED_LITERALS, choices=[WATCHED_LITERALS, SCAN, BITSET],
+        help="unit propagation: watched literals, clause rescans or bitsets (for small formulas)")
+    parser.add_argument('--output', default='results.jsonl', help="results file, .jsonl or .csv")
+    parser.add_argument('--no-cache', action='store_true', help="parse every file instead of using the FormulaCache")
+    parser.add_argument('--preprocess', action='store_true',
+        help="simplify the clauses (subsumption, variable elimination) before the search")
+    parser.add_argument('--probing', action='store_true',
+        help="probe failed literals and learn hyper-binary resolvents before the search")
+    parser.add_argument('--probe-interval', type=int, default=None,
+        help="with --probing, also probe every N restarts")
+    parser.add_argument('--check-proofs', action='store_true',
+        help="check the DRAT proof of every UNSAT answer, a rejected proof counts as a wrong answer")
+    parser.add_argument('--local-search', default=None, choices=LOCAL_SEARCH_ALGORITHMS,
+        help="solve with stochastic local search instead of CDCL (never answers UNSAT)")
+    parser.add_argument('--hybrid-flips', type=int, default=None,
+        help="with --local-search, run N flips then CDCL from the best assignment found")
+    parser.add_argument('--isolate', action='store_true',
+        help="solve every instance in a fresh process, so peak_rss_kb is per instance instead of per worker")
+    arguments = parser.parse_args()
+
+    options = {
+        'time_limit': arguments.time_limit,
+        'conflict_limit': arguments.conflict_limit,
+        'restarts': arguments.restarts,
+        'propagation': arguments.propagation,
+        'cache': not arguments.no_cache,
+        'preprocess': arguments.preprocess,
+        'probing': arguments.probing,
+        'probe_interval': arguments.probe_interval,
+        'check_proofs': arguments.check_proofs,
+        'local_search': arguments.local_search,
+        'hybrid_flips': arguments.hybrid_flips,
+    }
+    writer = ResultWriter(arguments.output)
+    counts = dict.fromkeys([SAT, UNSAT, UNKNOWN, ERROR], 0)
+    wrong = []
+    total_time = 0
+    for result in solve_instances(instances(arguments.paths), options, arguments.jobs, arguments.isolate):
+        writer.write(result)
+        counts[result['status']] += 1
+        total_time += result['time']
+        if result['wrong']:
+            wrong.append(result['instance'])
+            print("WRONG: " + result['instance'] + " got " + result['status'] + ", expected "
+                + str(result['expected']) + (" (" + result['error'] + ")" if result['error'] else ""))
+    writer.close()
+
+    print("Solved: " + ", ".join(map(lambda x: x[0] + " " + str(x[1]), counts.items())))
+    print("Wrong answers: " + str(len(wrong)))
+    print("Total solving time: " + str(round(total_time, 3)) + "s")
+    print("Results written to " + arguments.output)
+    if wrong:
+        sys.exit(1)
 
-# testFolder = 'uf20' # SAT
-# testFolder = 'uf50' # SAT
-testFolder = 'uuf50' # UNSAT
-# testFolder = 'uf75' # SAT
-# testFolder = 'uuf75' # UNSAT
-
-total = 0
-total_branches = 0
-success = 0
-total_time = 0
-for file in os.listdir(testFolder):
-    if '.cnf' not in file:
-        continue
-
-    print(file)
-    # Benchmark
-    isSatisfiable = 'uuf' not in file
-    
-    filepath = os.path.join(testFolder, file)
-    result, assignment_list, branching_count, time_elapsed = run(filepath)
-
-    total_branches += branching_count
-    total += 1
-    total_time += time_elapsed
-    if isSatisfiable == result:
-        print("success! " + filepath + ", Answer is: ", isSatisfiable, "and got: ", result)
-        success += 1
-    else:
-        print("Supposed to be: ", isSatisfiable, "but got: ", result)
-    
-print("Success Rate: ", success, "/", total)
-print("Average Branching Count: ", (total_branches / total))
-print("Total time elapsed: ", total_time)
+if __name__ == '__main__':
+    main()
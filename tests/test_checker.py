@@ -0,0 +1,39 @@
+import io
+import os
+from checker import check_proof, dimacs_to_literal
+from cdcl import parse_cnf, run
+from structures import Clause
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Every clause with 1 resolves to 1, which refutes -1 4 / -1 -4
+FORMULA = [[1, 2, 3], [1, -2, 3], [1, 2, -3], [1, -2, -3], [-1, 4], [-1, -4]]
+
+def make_clauses(formula):
+    return [Clause(list(map(dimacs_to_literal, x))) for x in formula]
+
+def test_rup_proof_is_verified():
+    checker = check_proof(make_clauses(FORMULA), b"1 3 0\n1 0\n0\n")
+    assert checker.verified, checker.error
+
+def test_lemma_that_is_not_implied_is_rejected():
+    # 1 2 is satisfiable, -1 and -2 are neither RUP nor RAT
+    checker = check_proof(make_clauses([[1, 2]]), b"-1 0\n-2 0\n0\n")
+    assert not checker.verified
+    assert checker.failed_lemma == [-2]
+
+def test_rat_pivot_is_the_first_literal_written():
+    # -7 -2 is not RUP, but RAT on -7: its only resolvent -7 -2 1 (with 7 1) is RUP. The checker reorders the
+    # literals of the lemma, so the pivot must be the first literal as written in the proof
+    proof = b"7 1 0\n-7 2 0\n-7 -2 0\n1 0\n0\n"
+    checker = check_proof(make_clauses(FORMULA), proof)
+    assert checker.verified, checker.error
+    assert checker.rat_count > 0
+
+def test_solver_proofs_are_verified():
+    for name in ['unsat.cnf', 'uuf50/uuf50-01.cnf']:
+        filename = os.path.join(ROOT, name)
+        proof = io.BytesIO()
+        result, _, _, _ = run(filename, proof=proof)
+        assert result is False
+        checker = check_proof(parse_cnf(filename)[1], proof.getvalue())
+        assert checker.verified, checker.error
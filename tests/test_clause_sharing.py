@@ -0,0 +1,81 @@
+import threading
+from clause_sharing import RING_SLOTS, ClauseExchange, create_shared_memory
+from structures import Clause
+
+def make_clause(index, size):
+    """ Clause whose literals all encode its index, so a record mixing two clauses is detected """
+    clause = Clause([index << 1] * size)
+    clause.lbd = 2
+    return clause
+
+def is_consistent(literals):
+    return len(set(literals)) == 1
+
+def exchanges(num_workers=2):
+    shared = create_shared_memory(num_workers)
+    return shared, [ClauseExchange(shared.name, worker, num_workers) for worker in range(num_workers)]
+
+def close(shared, workers):
+    for worker in workers:
+        worker.close()
+    shared.close()
+    shared.unlink()
+
+def test_records_are_imported():
+    shared, (writer, reader) = exchanges()
+    try:
+        for index in range(1, 11):
+            writer.export(make_clause(index, 1 + index % 8))
+        clauses = reader.import_clauses()
+        assert [literals[0] >> 1 for literals, _ in clauses] == list(range(1, 11))
+        assert all(map(lambda x: is_consistent(x[0]), clauses))
+    finally:
+        close(shared, [writer, reader])
+
+def test_record_in_flight_near_wraparound_is_dropped():
+    """ The writer published a position just short of lapping the reader, and is writing its next record, which
+    already overwrites the first slots the reader has not read yet """
+    shared, (writer, reader) = exchanges()
+    try:
+        index = 1
+        while writer.write_position + 10 <= RING_SLOTS - 4:
+            writer.export(make_clause(index, 8))
+            index += 1
+        while writer.write_position < RING_SLOTS - 4:
+            writer.export(make_clause(index, 1))
+            index += 1
+        # Unpublished record of 8 literals: it covers the slots 0 to 5 of the ring again
+        ring = writer.rings[0]
+        position = writer.write_position
+        for offset, value in enumerate([8, 2] + [999 << 1] * 8):
+            ring[(position + offset) % RING_SLOTS] = value
+        clauses = reader.import_clauses()
+        assert clauses == []
+        assert reader.dropped == 1
+    finally:
+        close(shared, [writer, reader])
+
+def test_concurrent_writer_never_mixes_clauses():
+    shared, (writer, reader) = exchanges()
+    stop = threading.Event()
+
+    def write():
+        index = 1
+        while not stop.is_set():
+            writer.export(make_clause(index, 1 + index % 8))
+            index += 1
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    imported = 0
+    try:
+        for _ in range(2000):
+            for literals, lbd in reader.import_clauses():
+                assert is_consistent(literals) and lbd == 2
+                assert len(literals) == 1 + (literals[0] >> 1) % 8
+                imported += 1
+    finally:
+        stop.set()
+        thread.join()
+        close(shared, [writer, reader])
+    assert imported > 0
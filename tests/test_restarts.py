@@ -0,0 +1,18 @@
+from restarts import luby, LubyRestarts
+
+LUBY_SEQUENCE = [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+
+def test_luby_sequence():
+    assert [luby(x) for x in range(len(LUBY_SEQUENCE))] == LUBY_SEQUENCE
+
+def test_luby_restarts_follow_the_sequence_from_its_first_term():
+    policy = LubyRestarts(unit=10)
+    limits = []
+    for _ in LUBY_SEQUENCE:
+        conflicts = 0
+        while not policy.should_restart():
+            policy.did_conflict(2)
+            conflicts += 1
+        limits.append(conflicts)
+        policy.did_restart()
+    assert limits == [10 * x for x in LUBY_SEQUENCE]
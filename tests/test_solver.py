@@ -0,0 +1,56 @@
+from itertools import product
+from solver import Solver
+
+CLAUSES = [[1, 2], [-1, 3, 4], [-2, -4], [4, 5, -3]]
+VARIABLES = range(1, 6)
+
+def make_solver(clauses=CLAUSES):
+    solver = Solver()
+    for clause in clauses:
+        solver.add_clause(clause)
+    return solver
+
+def count_models(clauses, variables):
+    """ Number of distinct assignments of the variables that extend to a model, by brute force """
+    all_variables = sorted({abs(x) for clause in clauses for x in clause})
+    projections = set()
+    for values in product([False, True], repeat=len(all_variables)):
+        assignment = dict(zip(all_variables, values))
+        if all(any(assignment[abs(x)] == (x > 0) for x in clause) for clause in clauses):
+            projections.add(tuple(assignment[x] for x in variables))
+    return len(projections)
+
+def as_tuple(model, variables):
+    return tuple(model[str(x)] for x in variables)
+
+def test_models_are_distinct_and_complete():
+    models = [as_tuple(x, VARIABLES) for x in make_solver().models()]
+    assert len(set(models)) == len(models) == count_models(CLAUSES, VARIABLES)
+
+def test_solve_between_models():
+    solver = make_solver()
+    models = []
+    for model in solver.models():
+        models.append(as_tuple(model, VARIABLES))
+        assert solver.solve(assumptions=[-1]) is True
+    assert len(set(models)) == len(models) == count_models(CLAUSES, VARIABLES)
+
+def test_solve_between_projected_models():
+    solver = make_solver()
+    projection = [1, 3]
+    models = []
+    for model in solver.models(projection=projection):
+        models.append(as_tuple(model, projection))
+        solver.solve(assumptions=[2])
+    assert len(set(models)) == len(models) == count_models(CLAUSES, projection)
+
+def test_add_clause_between_models():
+    solver = make_solver()
+    models = []
+    for model in solver.models():
+        models.append(as_tuple(model, VARIABLES))
+        if len(models) == 1:
+            solver.add_clause([5])
+    rest = CLAUSES + [[5]]
+    assert len(set(models)) == len(models) == 1 + count_models(rest, VARIABLES) - (models[0][4] is True)
+    assert solver.solve() is True